@@ -1,33 +1,191 @@
+import time
+STARTUP_T0 = time.perf_counter()  # startup timings are measured from here, before the heavy imports
 import os
 import sys
+import argparse
+import queue
+import threading
 import platform
 import subprocess
 import tkinter as tk
-from tkinter import ttk, filedialog, messagebox
-import pdfplumber
-import fitz  # PyMuPDF
+from tkinter import ttk, filedialog, messagebox, font as tkfont
 from datetime import datetime
-from pathlib import Path
+from unredact_index import INDEX_NAME, SearchIndex
+from unredact_export import EXPORT_FORMATS
+from unredact_metrics import slowest_report
+from unredact_queue import FileQueue, FolderScan
+from unredact_options import BACKENDS, CLEAN_PAGE_MODES
+
+try: from PIL import Image, ImageTk  # optional: blits frames straight into Tk
+except ImportError: Image = ImageTk = None
+
+
+def frame_photo(frame, photo=None):
+    """Turn a raw RGB frame into a Tk image, refilling ``photo`` in place when possible."""
+    width, height, samples = frame
+    if ImageTk is not None:
+        im = Image.frombuffer("RGB", (width, height), samples, "raw", "RGB", 0, 1)
+        if isinstance(photo, ImageTk.PhotoImage) and (photo.width(), photo.height()) == (width, height):
+            photo.paste(im)
+            return photo
+        return ImageTk.PhotoImage(im)
+    from unredact_viewer import ppm_bytes
+    if isinstance(photo, tk.PhotoImage):
+        photo.configure(data=ppm_bytes(frame), width=width, height=height)
+        return photo
+    return tk.PhotoImage(data=ppm_bytes(frame))
+
+
+LOG_FLUSH_MS = 250  # batch log lines are written to the widget at most this often
+LOG_MAX_LINES = 5000  # older log lines are dropped beyond this
+ZOOM_SETTLE_MS = 180  # wheel/keys idle this long before the real render at the final zoom
+SCAN_POLL_MS = 100  # how often streamed folder-scan results are moved into the lists
+
+
+class VirtualList:
+    """Scrollable list over a large sequence that keeps only the rows on screen in its Listbox.
+
+    ``count()`` gives the number of rows and ``row_text(i)`` returns ``(text, colour or None)``
+    for row ``i``; ``on_select(i)`` fires when the user picks a row.
+    """
+    def __init__(self, master, count, row_text, on_select=None, height=8, **opts):
+        self.count, self.row_text, self.on_select = count, row_text, on_select
+        self.first, self.visible, self.selected = 0, height, None
+        self.frame = ttk.Frame(master)
+        self.listbox = tk.Listbox(self.frame, height=height, exportselection=False, **opts)
+        self.scrollbar = ttk.Scrollbar(self.frame, orient="vertical", command=self.yview)
+        self.scrollbar.pack(side="right", fill="y")
+        self.listbox.pack(side="left", fill="both", expand=True)
+        self.listbox.bind("<Configure>", self._on_resize)
+        self.listbox.bind("<<ListboxSelect>>", self._on_click)
+        self.listbox.bind("<Up>", lambda e: self._step(-1))
+        self.listbox.bind("<Down>", lambda e: self._step(1))
+        for seq in ("<MouseWheel>", "<Button-4>", "<Button-5>"): self.listbox.bind(seq, self._on_wheel)
+        self._linespace = None
+
+    def pack(self, **kw): self.frame.pack(**kw)
+    def config(self, **opts): self.listbox.config(**opts)
+    def size(self): return self.count()
+
+    def curselection(self):
+        return (self.selected,) if self.selected is not None and self.selected < self.count() else ()
+
+    def refresh(self):
+        """Redraw the rows on screen, after rows were added or removed or their text changed."""
+        n, lb = self.count(), self.listbox
+        self.first = max(0, min(self.first, n - self.visible))
+        last = min(n, self.first + self.visible + 1)  # one extra for the partly visible bottom row
+        rows = [self.row_text(i) for i in range(self.first, last)]
+        lb.delete(0, "end")
+        if rows: lb.insert("end", *(text for text, _ in rows))
+        for k, (_, colour) in enumerate(rows):
+            if colour: lb.itemconfig(k, fg=colour)
+        if self.selected is not None and self.first <= self.selected < last: lb.selection_set(self.selected - self.first)
+        lb.yview_moveto(0)
+        self.scrollbar.set(*((self.first / n, min(1.0, (self.first + self.visible) / n)) if n else (0.0, 1.0)))
+
+    def see(self, i):
+        if i < self.first: self.first = i
+        elif i >= self.first + self.visible: self.first = i - self.visible + 1
+        self.refresh()
+
+    def select(self, i):
+        self.selected = i
+        self.see(i)
+
+    def clear_selection(self):
+        self.selected = None
+        self.refresh()
+
+    def yview(self, *args):
+        if args[0] == "moveto": self.first = int(float(args[1]) * self.count())
+        elif args[0] == "scroll": self.first += int(args[1]) * (self.visible if args[2] == "pages" else 1)
+        self.refresh()
+
+    def _on_resize(self, event):
+        if self._linespace is None: self._linespace = tkfont.Font(font=self.listbox.cget("font")).metrics("linespace") + 1
+        visible = max(1, event.height // self._linespace)
+        if visible != self.visible:
+            self.visible = visible
+            self.refresh()
+
+    def _on_wheel(self, event):
+        up = event.num == 4 or getattr(event, "delta", 0) > 0
+        self.yview("scroll", -3 if up else 3, "units")
+        return "break"
+
+    def _on_click(self, event):
+        sel = self.listbox.curselection()
+        if not sel: return
+        self.select(self.first + sel[0])
+        if self.on_select: self.on_select(self.selected)
+
+    def _step(self, delta):
+        if self.selected is None: return "break"
+        i = self.selected + delta
+        if 0 <= i < self.count():
+            self.select(i)
+            if self.on_select: self.on_select(i)
+        return "break"
+
 
 class ProfessionalUnredactApp:
-    def __init__(self, root):
+    def __init__(self, root, viewer_only=False, open_path=None, show_timing=False, quit_after_startup=False):
         self.root = root
-        self.root.title("Professional PDF Unredactor & Viewer")
+        self.root.title("Professional PDF Viewer" if viewer_only else "Professional PDF Unredactor & Viewer")
         self.root.geometry("1200x900")
+        self.viewer_only = viewer_only
+        self.startup = {}  # seconds from STARTUP_T0 to the first window and the first rendered page
+        self.show_timing = show_timing
+        self.quit_after_startup = quit_after_startup and (open_path and "first_page" or "window")
+        self.startup_error = None
+        self._built_tabs = set()
         
         # Core State
-        self.files_to_process = []
+        self.files_to_process = FileQueue()
+        self.folder_scans = []
         self.output_dir = tk.StringVar()
         self.mode = tk.StringVar(value="side_by_side")
         self.include_subdirs = tk.BooleanVar(value=True)
+        self.workers = tk.IntVar(value=1)
+        self.backend = tk.StringVar(value="pymupdf")
+        self.redacted_only = tk.BooleanVar(value=False)
+        self.clean_pages = tk.StringVar(value="process")
+        self.write_pdf = tk.BooleanVar(value=True)
+        self.export = tk.StringVar(value="none")
+        self.skip_unchanged = tk.BooleanVar(value=True)
+        self.file_timeout = tk.IntVar(value=0)  # limits run each file in a child process of its own, so they are opt-in
+        self.max_memory = tk.IntVar(value=0)
+        self.max_pages = tk.IntVar(value=0)
+        self.batch_control = None
+        self.batch_events = queue.Queue()
+        self._log_pending = []
+        self._log_job = None
         self.current_theme = tk.StringVar(value="Professional White")
         
         # Viewer State
         self.viewer_dir = None
+        self.viewer_files = FileQueue()  # names of the outputs listed in the viewer
+        self.viewer_scan = None
         self.current_pdf_doc = None
+        self.current_pdf_path = None
+        self.current_page_count = 0
+        self.doc_pool = self.page_cache = self.prefetcher = None  # set up with the viewer tab
+        self.page_rects = {}
+        self.tile_state = None
+        self.tile_images = {}
+        self._tile_job = None
         self.current_page_num = 0
         self.zoom_level = 1.0
+        self.shown_frame = None  # (frame, zoom) currently on the canvas, source for interim zoom previews
+        self.interim_ref = None
+        self._zoom_job = None
+        self.page_origin = (0, 10)
+        self.search_var = tk.StringVar()
+        self.search_hits = []
+        self.search_highlight = None  # index hit to outline when its page is on screen
         self.tk_image_ref = None
+        self.page_item = None
         self.is_fullscreen = False
         
         # Sidebar Animation State
@@ -79,6 +237,16 @@ class ProfessionalUnredactApp:
         self._build_layout()
         self._bind_shortcuts()
         self.apply_theme("Professional White")
+        self.root.bind("<Map>", self._on_first_map, add="+")
+        if open_path: self.open_in_viewer(open_path)
+
+    def _on_first_map(self, event):
+        if event.widget is self.root and "window" not in self.startup: self._mark_startup("window")
+
+    def _mark_startup(self, stage):
+        self.startup[stage] = time.perf_counter() - STARTUP_T0
+        if self.show_timing: print(f"startup: {stage} after {self.startup[stage]:.3f}s", file=sys.stderr, flush=True)
+        if stage == self.quit_after_startup: self.root.after(0, self.root.destroy)
 
     def _init_style_engine(self):
         self.style = ttk.Style()
@@ -168,14 +336,15 @@ class ProfessionalUnredactApp:
         self.tabs = ttk.Notebook(self.root)
         self.tabs.pack(side="top", fill="both", expand=True, padx=15, pady=10)
 
-        self.tab_process = ttk.Frame(self.tabs)
+        self.tab_process = None if self.viewer_only else ttk.Frame(self.tabs)
         self.tab_viewer = ttk.Frame(self.tabs)
         
-        self.tabs.add(self.tab_process, text=" DASHBOARD / PROCESSOR ")
+        if self.tab_process: self.tabs.add(self.tab_process, text=" DASHBOARD / PROCESSOR ")
         self.tabs.add(self.tab_viewer, text=" RESULTS VIEWER ")
         
-        self._build_process_tab(self.tab_process)
-        self._build_viewer_tab(self.tab_viewer)
+        # Only the tab on screen is built now; the other is built the first time it is opened.
+        self._ensure_tab(self.tab_process or self.tab_viewer, themed=False)  # __init__ applies the theme
+        self.tabs.bind("<<NotebookTabChanged>>", lambda e: self._ensure_tab(self.root.nametowidget(self.tabs.select())))
 
         # Footer
         self.footer_frame = tk.Frame(self.root)
@@ -190,6 +359,13 @@ class ProfessionalUnredactApp:
         )
         self.footer_label.pack(side="bottom")
 
+    def _ensure_tab(self, tab, themed=True):
+        if tab in self._built_tabs: return
+        self._built_tabs.add(tab)
+        if tab is self.tab_process: self._build_process_tab(tab)
+        else: self._build_viewer_tab(tab)
+        if themed: self.apply_theme(self.current_theme.get())
+
     def _build_process_tab(self, parent):
         container = ttk.Frame(parent, padding=20)
         container.pack(fill="both", expand=True)
@@ -205,7 +381,8 @@ class ProfessionalUnredactApp:
         ttk.Checkbutton(btn_box, text="Include Subfolders", variable=self.include_subdirs).pack(side="left", padx=20)
         ttk.Button(btn_box, text="CLEAR LIST", style="Action.TButton", command=self.clear_queue).pack(side="right")
 
-        self.queue_list = tk.Listbox(in_frame, height=8, bd=1, relief="solid", highlightthickness=1)
+        self.queue_list = VirtualList(in_frame, lambda: len(self.files_to_process), self._queue_row,
+                                      height=8, bd=1, relief="solid", highlightthickness=1)
         self.queue_list.pack(fill="x", pady=5)
         self.lbl_count = ttk.Label(in_frame, text="Queue Empty", font=("Segoe UI", 9, "bold"))
         self.lbl_count.pack(anchor="e")
@@ -225,21 +402,59 @@ class ProfessionalUnredactApp:
         ttk.Label(opt_row, text="Recovery Mode:").pack(side="left", padx=(0, 10))
         ttk.Radiobutton(opt_row, text="Side-by-Side (Comparison)", variable=self.mode, value="side_by_side").pack(side="left", padx=10)
         ttk.Radiobutton(opt_row, text="Overlay (White Text)", variable=self.mode, value="overlay_white").pack(side="left", padx=10)
+        ttk.Spinbox(opt_row, from_=1, to=os.cpu_count() or 1, textvariable=self.workers, width=4).pack(side="right")
+        ttk.Label(opt_row, text="Worker Processes:").pack(side="right", padx=(0, 5))
+        ttk.Combobox(opt_row, textvariable=self.backend, values=list(BACKENDS), state="readonly", width=11).pack(side="right", padx=(0, 20))
+        ttk.Label(opt_row, text="Extraction:").pack(side="right", padx=(0, 5))
+
+        det_row = ttk.Frame(out_frame)
+        det_row.pack(fill="x", pady=(10, 0))
+        ttk.Checkbutton(det_row, text="Recover Redacted Regions Only", variable=self.redacted_only).pack(side="left")
+        ttk.Checkbutton(det_row, text="Skip Unchanged Files", variable=self.skip_unchanged).pack(side="left", padx=20)
+        ttk.Combobox(det_row, textvariable=self.clean_pages, values=list(CLEAN_PAGE_MODES), state="readonly", width=11).pack(side="right")
+        ttk.Label(det_row, text="Pages Without Redactions:").pack(side="right", padx=(0, 5))
+
+        export_row = ttk.Frame(out_frame)
+        export_row.pack(fill="x", pady=(10, 0))
+        ttk.Checkbutton(export_row, text="Write Unredacted PDFs", variable=self.write_pdf).pack(side="left")
+        ttk.Combobox(export_row, textvariable=self.export, values=["none"] + list(EXPORT_FORMATS), state="readonly", width=11).pack(side="right")
+        ttk.Label(export_row, text="Text Export:").pack(side="right", padx=(0, 5))
+
+        limit_row = ttk.Frame(out_frame)
+        limit_row.pack(fill="x", pady=(10, 0))
+        ttk.Label(limit_row, text="Per-File Limits (0 = none):").pack(side="left", padx=(0, 10))
+        for label, var, top in (("Seconds", self.file_timeout, 86400), ("Memory MB", self.max_memory, 1 << 20), ("Pages", self.max_pages, 1 << 24)):
+            ttk.Label(limit_row, text=f"{label}:").pack(side="left", padx=(10, 5))
+            ttk.Spinbox(limit_row, from_=0, to=top, textvariable=var, width=7).pack(side="left")
 
         # Execute
         run_frame = ttk.LabelFrame(container, text=" 3. EXECUTE ", padding=15)
         run_frame.pack(fill="both", expand=True)
 
-        self.btn_run = ttk.Button(run_frame, text="RUN BATCH PROCESS", style="Primary.TButton", command=self.start_processing)
-        self.btn_run.pack(fill="x", pady=(0, 15), ipady=5)
-
-        self.progress = ttk.Progressbar(run_frame, orient="horizontal", mode="determinate")
-        self.progress.pack(fill="x", pady=(0, 10))
+        run_row = ttk.Frame(run_frame)
+        run_row.pack(fill="x", pady=(0, 15))
+        self.btn_cancel = ttk.Button(run_row, text="CANCEL", style="Action.TButton", command=self.cancel_processing, state="disabled")
+        self.btn_cancel.pack(side="right", fill="y", padx=(5, 0))
+        self.btn_pause = ttk.Button(run_row, text="PAUSE", style="Action.TButton", command=self.toggle_pause, state="disabled")
+        self.btn_pause.pack(side="right", fill="y", padx=(5, 0))
+        self.btn_run = ttk.Button(run_row, text="RUN BATCH PROCESS", style="Primary.TButton", command=self.start_processing)
+        self.btn_run.pack(side="left", fill="x", expand=True, ipady=5)
+
+        prog_row = ttk.Frame(run_frame)
+        prog_row.pack(fill="x", pady=(0, 10))
+        self.lbl_stats = ttk.Label(prog_row, text="", font=("Segoe UI", 9, "bold"))
+        self.lbl_stats.pack(side="right", padx=(10, 0))
+        self.progress = ttk.Progressbar(prog_row, orient="horizontal", mode="determinate")
+        self.progress.pack(side="left", fill="x", expand=True)
 
         self.log_text = tk.Text(run_frame, height=8, bd=1, relief="solid", highlightthickness=0)
         self.log_text.pack(fill="both", expand=True)
 
     def _build_viewer_tab(self, parent):
+        from unredact_viewer import DocumentPool, PageCache, PagePrefetcher  # PyMuPDF loads with the first document
+        self.doc_pool = DocumentPool()
+        self.page_cache = PageCache()
+        self.prefetcher = PagePrefetcher(self.doc_pool, self.page_cache)
         self.viewer_container = ttk.Frame(parent)
         self.viewer_container.pack(fill="both", expand=True, padx=10, pady=10)
 
@@ -259,9 +474,20 @@ class ProfessionalUnredactApp:
         ttk.Button(row2, text="REFRESH", style="Action.TButton", command=self.refresh_file_list).pack(side="left", fill="x", expand=True, padx=(0,2))
         ttk.Button(row2, text="OPEN DIR", style="Action.TButton", command=self.open_current_folder).pack(side="left", fill="x", expand=True, padx=(2,0))
         
-        self.file_listbox = tk.Listbox(self.viewer_left, bd=1, relief="solid", highlightthickness=0, activestyle="none")
+        search_row = ttk.Frame(self.viewer_left, style="Panel.TFrame")
+        search_row.pack(fill="x")
+        search_entry = ttk.Entry(search_row, textvariable=self.search_var)
+        search_entry.pack(side="left", fill="x", expand=True, padx=(0, 2))
+        search_entry.bind("<Return>", lambda e: self.run_search())
+        ttk.Button(search_row, text="SEARCH", style="Action.TButton", command=self.run_search).pack(side="left")
+        self.search_listbox = tk.Listbox(self.viewer_left, height=8, bd=1, relief="solid", highlightthickness=0, activestyle="none")
+        self.search_listbox.pack(fill="x", pady=(5, 10))
+        self.search_listbox.bind("<<ListboxSelect>>", self.on_search_select)
+
+        self.file_listbox = VirtualList(self.viewer_left, lambda: len(self.viewer_files), lambda i: (self.viewer_files[i], None),
+                                        on_select=self.load_pdf_from_list, bd=1, relief="solid", highlightthickness=0,
+                                        activestyle="none")
         self.file_listbox.pack(fill="both", expand=True)
-        self.file_listbox.bind("<<ListboxSelect>>", self.on_file_select)
 
         # Preview Area
         self.viewer_right = ttk.Frame(self.viewer_container, padding=(10, 0, 0, 0))
@@ -288,11 +514,12 @@ class ProfessionalUnredactApp:
         self.preview_canvas = tk.Canvas(self.canvas_container, bd=0, highlightthickness=0)
         self.preview_canvas.pack(side="left", fill="both", expand=True)
 
-        vs = ttk.Scrollbar(self.canvas_container, orient="vertical", command=self.preview_canvas.yview)
+        vs = ttk.Scrollbar(self.canvas_container, orient="vertical", command=self.on_canvas_yview)
         vs.pack(side="right", fill="y")
-        hs = ttk.Scrollbar(self.viewer_right, orient="horizontal", command=self.preview_canvas.xview)
+        hs = ttk.Scrollbar(self.viewer_right, orient="horizontal", command=self.on_canvas_xview)
         hs.pack(side="bottom", fill="x")
         self.preview_canvas.config(yscrollcommand=vs.set, xscrollcommand=hs.set)
+        self.preview_canvas.bind("<Configure>", lambda e: self._schedule_tile_update())
         self.preview_canvas.bind("<Control-MouseWheel>", self.on_mousewheel_zoom)
 
         nav_bar = ttk.Frame(self.viewer_right, padding=5)
@@ -345,31 +572,55 @@ class ProfessionalUnredactApp:
 
     # --- UTILS ---
     def log(self, msg):
-        self.log_text.insert("end", f"[{datetime.now().strftime('%H:%M:%S')}] {msg}\n")
+        """Queue a log line; lines are written to the widget in one go at most every LOG_FLUSH_MS."""
+        self._log_pending.append(f"[{datetime.now().strftime('%H:%M:%S')}] {msg}\n")
+        if not self._log_job: self._log_job = self.root.after(LOG_FLUSH_MS, self._flush_log)
+
+    def _flush_log(self):
+        self._log_job = None
+        if not self._log_pending: return
+        if not hasattr(self, "log_text"):  # viewer-only launch: no dashboard log
+            sys.stdout.write("".join(self._log_pending))
+            self._log_pending = []
+            return
+        self.log_text.insert("end", "".join(self._log_pending))
+        self._log_pending = []
+        excess = int(self.log_text.index("end-1c").split(".")[0]) - LOG_MAX_LINES
+        if excess > 0: self.log_text.delete("1.0", f"{excess + 1}.0")
         self.log_text.see("end")
-        self.root.update_idletasks()
 
     def add_files(self):
         files = filedialog.askopenfilenames(filetypes=[("PDF Documents", "*.pdf")])
         if files:
-            for f in files:
-                if f not in self.files_to_process:
-                    self.files_to_process.append(f)
-                    self.queue_list.insert("end", os.path.basename(f))
-            self.lbl_count.config(text=f"{len(self.files_to_process)} FILES QUEUED")
+            self.files_to_process.add(files)
+            self._update_queue_view()
 
     def add_folder(self):
         folder = filedialog.askdirectory()
         if folder:
-            p = Path(folder)
-            found = p.rglob("*.pdf") if self.include_subdirs.get() else p.glob("*.pdf")
-            c = 0
-            for f in found:
-                if f.is_file() and str(f) not in self.files_to_process:
-                    self.files_to_process.append(str(f))
-                    self.queue_list.insert("end", f.name)
-                    c += 1
-            self.lbl_count.config(text=f"{len(self.files_to_process)} FILES QUEUED")
+            self.folder_scans.append(FolderScan(folder, recursive=self.include_subdirs.get()))
+            if len(self.folder_scans) == 1: self.root.after(SCAN_POLL_MS, self._poll_folder_scans)
+
+    def _poll_folder_scans(self):
+        """Move paths found by the background scans into the queue; re-arms itself until they finish."""
+        for scan in self.folder_scans:
+            for paths in scan.batches(): self.files_to_process.add(paths)
+        self.folder_scans = [s for s in self.folder_scans if not s.done]
+        self._update_queue_view()
+        if self.folder_scans: self.root.after(SCAN_POLL_MS, self._poll_folder_scans)
+
+    def _update_queue_view(self):
+        n = len(self.files_to_process)
+        scanning = " (SCANNING...)" if self.folder_scans else ""
+        self.lbl_count.config(text=f"{n} FILES QUEUED{scanning}" if n or scanning else "QUEUE EMPTY")
+        self.queue_list.refresh()
+
+    def _queue_row(self, i):
+        path = self.files_to_process[i]
+        status = self.files_to_process.status.get(path)
+        if not status: return os.path.basename(path), None
+        colors = {"DONE": "#2E7D32", "FAILED": "#C62828", "UNCHANGED": "#888888", "RUNNING": self.themes[self.current_theme.get()]["accent"]}
+        return f"{os.path.basename(path)}   [{status}]", colors.get(status)
 
     def browse_output(self):
         d = filedialog.askdirectory()
@@ -380,9 +631,11 @@ class ProfessionalUnredactApp:
                 self.refresh_file_list()
 
     def clear_queue(self):
-        self.files_to_process = []
-        self.queue_list.delete(0, "end")
-        self.lbl_count.config(text="QUEUE EMPTY")
+        for scan in self.folder_scans: scan.cancel()
+        self.folder_scans = []
+        self.files_to_process = FileQueue()
+        self.queue_list.selected = None
+        self._update_queue_view()
 
     def browse_viewer_folder(self):
         d = filedialog.askdirectory()
@@ -401,104 +654,261 @@ class ProfessionalUnredactApp:
 
     # --- PDF ENGINE ---
     def start_processing(self):
+        from unredact_engine import EngineConfig, UnredactEngine, BatchControl
+        if self.batch_control: return
         if not self.files_to_process or not self.output_dir.get():
             messagebox.showwarning("Incomplete", "Please add files and select output.")
             return
 
-        self.btn_run.config(state="disabled")
+        export = "" if self.export.get() == "none" else self.export.get()
+        if not self.write_pdf.get() and not export:
+            messagebox.showwarning("Nothing To Write", "Enable PDF output or choose a text export format.")
+            return
+
         dest = self.output_dir.get()
+        files = list(self.files_to_process)
+        try: workers = max(1, int(self.workers.get()))
+        except (tk.TclError, ValueError): workers = 1
+        limits = {}
+        for key, var in (("file_timeout", self.file_timeout), ("max_memory_mb", self.max_memory), ("max_pages", self.max_pages)):
+            try: limits[key] = max(0, int(var.get()))
+            except (tk.TclError, ValueError): limits[key] = 0
+        engine = UnredactEngine(EngineConfig(output_dir=dest, mode=self.mode.get(), backend=self.backend.get(), workers=workers,
+                                             redacted_only=self.redacted_only.get(), clean_pages=self.clean_pages.get(),
+                                             skip_unchanged=self.skip_unchanged.get(), export=export,
+                                             write_pdf=self.write_pdf.get(), **limits),
+                                log=lambda msg: self.batch_events.put(("log", msg)))
+
+        self.batch_control = BatchControl()
+        self.batch = {"engine": engine, "dest": dest, "queue": self.files_to_process, "files": files, "total": len(files),
+                      "done": 0, "pages": 0, "t0": time.perf_counter(), "paused_at": None, "paused_for": 0.0}
+        for f in files: self._set_queue_status(f, "QUEUED")
         self.progress["value"] = 0
-        self.progress["maximum"] = len(self.files_to_process)
-        
+        self.progress["maximum"] = len(files)
+        self.btn_run.config(state="disabled")
+        self.btn_pause.config(state="normal", text="PAUSE")
+        self.btn_cancel.config(state="normal")
+
+        def work():
+            try:
+                results = engine.run_batch(files, on_start=lambda f: self.batch_events.put(("start", f)),
+                                           on_result=lambda i, res: self.batch_events.put(("result", res)),
+                                           control=self.batch_control)
+            except Exception as e:
+                self.batch_events.put(("log", f"Error: {e}"))
+                results = []
+            self.batch_events.put(("finished", results))
+
+        threading.Thread(target=work, daemon=True).start()
+        self.root.after(100, self._poll_batch_events)
+
+    def toggle_pause(self):
+        if not self.batch_control: return
+        b = self.batch
+        if self.batch_control.paused:
+            b["paused_for"] += time.perf_counter() - b["paused_at"]
+            b["paused_at"] = None
+            self.batch_control.resume()
+            self.btn_pause.config(text="PAUSE")
+            self.log("Batch resumed.")
+        else:
+            b["paused_at"] = time.perf_counter()
+            self.batch_control.pause()
+            self.btn_pause.config(text="RESUME")
+            self.log("Pausing after files in progress finish...")
+
+    def cancel_processing(self):
+        if not self.batch_control: return
+        if self.batch["paused_at"]:
+            self.batch["paused_for"] += time.perf_counter() - self.batch["paused_at"]
+            self.batch["paused_at"] = None
+        self.batch_control.cancel()
+        self.btn_pause.config(state="disabled")
+        self.btn_cancel.config(state="disabled")
+        self.log("Cancelling after files in progress finish...")
+
+    def _set_queue_status(self, path, status):
+        """Record a row's status; the list redraws once per poll rather than per file."""
+        q = self.batch["queue"]
+        if q is not self.files_to_process or path not in q: return  # queue was cleared mid-batch
+        q.status[path] = status
+        if status == "RUNNING": self.queue_list.first = max(0, q.row(path) - self.queue_list.visible // 2)
+
+    def _update_batch_stats(self):
+        b = self.batch
+        now = b["paused_at"] or time.perf_counter()
+        elapsed = max(now - b["t0"] - b["paused_for"], 1e-6)
+        fps, pps = b["done"] / elapsed, b["pages"] / elapsed
+        remaining = b["total"] - b["done"]
+        eta = time.strftime("%H:%M:%S", time.gmtime(remaining / fps)) if fps > 0 else "--:--:--"
+        state = "PAUSED | " if b["paused_at"] else ""
+        self.lbl_stats.config(text=f"{state}{b['done']}/{b['total']} | {fps:.2f} files/s | {pps:.1f} pages/s | ETA {eta}")
+
+    def _poll_batch_events(self):
+        from unredact_engine import format_output_size
+        finished = None
         try:
-            for i, f_path in enumerate(self.files_to_process):
-                fname = os.path.basename(f_path)
-                self.log(f"Processing: {fname}")
-                try:
-                    self.process_pdf(f_path, dest)
-                except Exception as e:
-                    self.log(f"Error: {e}")
-                self.progress["value"] = i + 1
-            
-            self.log("BATCH COMPLETE.")
-            messagebox.showinfo("Success", "All files processed.")
-            self.viewer_dir = dest
-            self.refresh_file_list()
-            self.tabs.select(self.tab_viewer)
-        finally:
-            self.btn_run.config(state="normal")
-
-    def process_pdf(self, input_path, output_dir):
-        extracted_data = []
-        with pdfplumber.open(input_path) as pdf:
-            for page in pdf.pages:
-                words = page.extract_words(extra_attrs=["size"])
-                words.sort(key=lambda w: (float(w["top"]), float(w["x0"])))
-                lines = []
-                if words:
-                    curr, curr_top = [words[0]], float(words[0]["top"])
-                    for w in words[1:]:
-                        top = float(w["top"])
-                        if abs(top - curr_top) <= 3.0: curr.append(w)
-                        else:
-                            lines.append(curr)
-                            curr, curr_top = [w], top
-                    lines.append(curr)
-                p_data = []
-                for line in lines:
-                    line.sort(key=lambda w: float(w["x0"]))
-                    txt = " ".join(w["text"] for w in line)
-                    if txt.strip():
-                        p_data.append((txt, float(line[0]["x0"]), float(line[0]["top"]), float(line[0].get("size", 10))))
-                extracted_data.append(p_data)
-
-        doc = fitz.open(input_path)
-        out = fitz.open()
-        for i, page in enumerate(doc):
-            w, h = page.rect.width, page.rect.height
-            if self.mode.get() == "side_by_side":
-                np = out.new_page(width=w*2, height=h)
-                np.show_pdf_page(fitz.Rect(0, 0, w, h), doc, i)
-                off = w
-            else:
-                np = out.new_page(width=w, height=h)
-                np.show_pdf_page(fitz.Rect(0, 0, w, h), doc, i)
-                off = 0
-            if i < len(extracted_data):
-                col = (1, 1, 1) if self.mode.get() == "overlay_white" else (0, 0, 0)
-                for (t, x, y, s) in extracted_data[i]:
-                    np.insert_text(fitz.Point(x + off, y + s), t, fontsize=s, fontname="helv", color=col)
-        
-        out.save(os.path.join(output_dir, f"UNREDACTED_{os.path.basename(input_path)}"))
+            while True:
+                kind, payload = self.batch_events.get_nowait()
+                if kind == "log": self.log(payload)
+                elif kind == "start": self._set_queue_status(payload, "RUNNING")
+                elif kind == "result":
+                    self.batch["done"] += 1
+                    self.batch["pages"] += payload["pages"]
+                    if payload["status"] == "ok":
+                        self._set_queue_status(payload["input"], "DONE")
+                        if "output_bytes" in payload: self.log(f"Done: {os.path.basename(payload['input'])}: {format_output_size(payload)}")
+                        if "fallback" in payload: self.log(f"Fallback: {os.path.basename(payload['input'])}: {payload['fallback']}")
+                    elif payload["status"] == "skipped": self._set_queue_status(payload["input"], "UNCHANGED")
+                    else:
+                        self._set_queue_status(payload["input"], "FAILED")
+                        self.log(f"Error: {os.path.basename(payload['input'])}: {payload['error']}")
+                    self.progress["value"] = self.batch["done"]
+                elif kind == "finished": finished = payload
+        except queue.Empty:
+            pass
+        self.queue_list.refresh()
+        self._update_batch_stats()
+        if finished is None:
+            self.root.after(200, self._poll_batch_events)
+        else:
+            self._finish_batch(finished)
+
+    def _finish_batch(self, results):
+        from unredact_engine import summarize, format_summary
+        b, cancelled = self.batch, self.batch_control.cancelled
+        self.batch_control = None
+        self.btn_run.config(state="normal")
+        self.btn_pause.config(state="disabled", text="PAUSE")
+        self.btn_cancel.config(state="disabled")
+        finished = {r["input"] for r in results}
+        for f in b["files"]:
+            if f not in finished: self._set_queue_status(f, "CANCELLED")
+        self.queue_list.refresh()
+        summary = format_summary(summarize(results, time.perf_counter() - b["t0"] - b["paused_for"]))
+        if cancelled:
+            self.log(f"BATCH CANCELLED. {summary}")
+            return
+        self.log(f"BATCH COMPLETE. {summary}")
+        for line in slowest_report(results): self.log(line)
+        if b["engine"].last_metrics_path: self.log(f"Metrics: {b['engine'].last_metrics_path}")
+        self._flush_log()
+        messagebox.showinfo("Success", "All files processed.")
+        self.viewer_dir = b["dest"]
+        self.refresh_file_list()
+        self.tabs.select(self.tab_viewer)
 
     # --- VIEWER ---
-    def refresh_file_list(self):
+    def refresh_file_list(self, then=None):
+        """List the viewer folder's PDFs via a background scan; ``then()`` runs once the listing is complete."""
+        self._ensure_tab(self.tab_viewer)
         target_dir = self.viewer_dir if self.viewer_dir else self.output_dir.get()
-        self.file_listbox.delete(0, "end")
+        if self.viewer_scan: self.viewer_scan.cancel()
+        self.viewer_scan = None
+        self.viewer_files = FileQueue()
+        self.file_listbox.selected = None
+        self.file_listbox.refresh()
         if not target_dir or not os.path.exists(target_dir): return
-        files = sorted([f for f in os.listdir(target_dir) if f.lower().endswith(".pdf")])
-        for f in files: self.file_listbox.insert("end", f)
-
-    def on_file_select(self, event):
-        sel = self.file_listbox.curselection()
-        if not sel: return
-        self.load_pdf_from_list(sel[0])
-
-    def load_pdf_from_list(self, index):
-        self.file_listbox.selection_clear(0, "end")
-        self.file_listbox.selection_set(index)
-        self.file_listbox.see(index)
-        fname = self.file_listbox.get(index)
+        self.viewer_scan = FolderScan(target_dir, recursive=False)
+        self.root.after(SCAN_POLL_MS, self._poll_viewer_scan, self.viewer_scan, then)
+
+    def _poll_viewer_scan(self, scan, then):
+        if scan is not self.viewer_scan: return  # superseded by a newer refresh
+        for paths in scan.batches(): self.viewer_files.add(os.path.basename(p) for p in paths)
+        if scan.done:
+            self.viewer_scan = None
+            selected = self.viewer_files[self.file_listbox.selected] if self.file_listbox.curselection() else None
+            self.viewer_files.sort()
+            if selected: self.file_listbox.selected = self.viewer_files.row(selected)
+        self.file_listbox.refresh()
+        if not scan.done: self.root.after(SCAN_POLL_MS, self._poll_viewer_scan, scan, then)
+        elif then: then()
+
+    def open_in_viewer(self, path):
+        """Show a folder in the viewer, or a PDF with its folder listed alongside it."""
+        path = os.path.abspath(path)
+        folder, name = (path, None) if os.path.isdir(path) else (os.path.dirname(path), os.path.basename(path))
+        self.viewer_dir = folder
+        self.tabs.select(self.tab_viewer)
+
+        def show_first():
+            row = self.viewer_files.row(name) if name else 0
+            if row is not None and row < len(self.viewer_files): self.load_pdf_from_list(row)
+            if "first_page" not in self.startup and self.quit_after_startup == "first_page":
+                self.startup_error = f"no PDF could be shown from {path}"
+                print(f"startup failed: {self.startup_error}", file=sys.stderr, flush=True)
+                self.root.after(0, self.root.destroy)
+
+        self.refresh_file_list(then=show_first)
+
+    def load_pdf_from_list(self, index, page=0):
+        from unredact_viewer import FITZ_LOCK
+        self.file_listbox.select(index)
+        fname = self.viewer_files[index]
         target_dir = self.viewer_dir if self.viewer_dir else self.output_dir.get()
         fpath = os.path.join(target_dir, fname)
-        if self.current_pdf_doc: self.current_pdf_doc.close()
         try:
-            self.current_pdf_doc = fitz.open(fpath)
-            self.current_page_num = 0
+            self.current_pdf_doc = self.doc_pool.get(fpath)
+            self.doc_pool.pinned = {fpath}
+            self.current_pdf_path = fpath
+            with FITZ_LOCK: self.current_page_count = self.current_pdf_doc.page_count
+            self.current_page_num = min(page, self.current_page_count - 1)
             self.render_page()
             self.update_nav_buttons()
         except: pass
 
+    # --- SEARCH ---
+    def run_search(self):
+        self.search_listbox.delete(0, "end")
+        self.search_hits = []
+        query = self.search_var.get().strip()
+        target_dir = self.viewer_dir if self.viewer_dir else self.output_dir.get()
+        if not query or not target_dir: return
+        path = os.path.join(target_dir, INDEX_NAME)
+        if not os.path.exists(path):
+            self.search_listbox.insert("end", "No search index in this folder yet")
+            return
+        t0 = time.perf_counter()
+        try:
+            with SearchIndex(path) as index: self.search_hits = index.search(query)
+        except Exception as e:
+            self.search_listbox.insert("end", f"Search failed: {e}")
+            return
+        for h in self.search_hits:
+            self.search_listbox.insert("end", f"{os.path.basename(h['output'])} p.{h['page'] + 1}: {h['text']}")
+        self.log(f"Search '{query}': {len(self.search_hits)} hits in {(time.perf_counter() - t0) * 1000:.0f} ms")
+
+    def on_search_select(self, event):
+        sel = self.search_listbox.curselection()
+        if not sel or sel[0] >= len(self.search_hits): return
+        hit = self.search_hits[sel[0]]
+        fname = os.path.basename(hit["output"])
+
+        def show():
+            row = self.viewer_files.row(fname)
+            if row is None: return
+            self.search_highlight = dict(hit, scroll=True)
+            self.load_pdf_from_list(row, page=hit["page"])
+            self.search_listbox.selection_set(sel[0])
+
+        if fname in self.viewer_files: show()
+        else: self.refresh_file_list(then=show)
+
+    def _draw_search_highlight(self):
+        c = self.preview_canvas
+        c.delete("hit")
+        from unredact_viewer import hit_rect
+        hit = self.search_highlight
+        if not hit or os.path.abspath(self.current_pdf_path) != hit["output"] or self.current_page_num != hit["page"]: return
+        x0, y0, x1, y1 = hit_rect(hit, self.zoom_level, self.page_origin)
+        c.create_rectangle(x0 - 3, y0 - 3, x1 + 3, y1 + 3, outline="#ff8c00", width=3, tags="hit")
+        region = [float(v) for v in str(c.cget("scrollregion")).split()]
+        if hit.get("scroll") and len(region) == 4 and region[3] > 0:
+            hit["scroll"] = False  # only bring it into view on the jump, not on every later re-render
+            c.yview_moveto(max(0.0, (y0 - c.winfo_height() / 3) / region[3]))
+            c.xview_moveto(max(0.0, (x0 - 40) / max(region[2], 1)))
+            self._schedule_tile_update()
+
     # --- PREV/NEXT FILE ---
     def prev_file(self, event=None):
         if self.tabs.select() != self.tab_viewer._w: return
@@ -516,38 +926,172 @@ class ProfessionalUnredactApp:
 
     # --- PAGE RENDER ---
     def render_page(self):
+        from unredact_viewer import TILED_MIN_PIXELS, page_pixel_size
         if not self.current_pdf_doc: return
-        page = self.current_pdf_doc.load_page(self.current_page_num)
-        mat = fitz.Matrix(self.zoom_level, self.zoom_level)
-        pix = page.get_pixmap(matrix=mat)
-        self.tk_image_ref = tk.PhotoImage(data=pix.tobytes("ppm"))
-        self.preview_canvas.delete("all")
-        cw = int(self.preview_canvas.winfo_width())
-        cx = max(0, (cw - pix.width) // 2)
-        self.preview_canvas.create_image(cx, 10, image=self.tk_image_ref, anchor="nw")
-        self.preview_canvas.config(scrollregion=self.preview_canvas.bbox("all"))
-        self.lbl_page.config(text=f"Page {self.current_page_num + 1} of {self.current_pdf_doc.page_count}")
+        if self._zoom_job:
+            self.root.after_cancel(self._zoom_job)
+            self._zoom_job = None
+        width, height = page_pixel_size(*self._page_size(), self.zoom_level)
+        if width * height > TILED_MIN_PIXELS:
+            self._render_tiled(width, height)
+        else:
+            self._render_full()
+        self.lbl_page.config(text=f"Page {self.current_page_num + 1} of {self.current_page_count}")
         self.lbl_zoom.config(text=f"{int(self.zoom_level * 100)}%")
-
-    def zoom_in(self):
-        self.zoom_level *= 1.2
-        self.render_page()
-    def zoom_out(self):
-        self.zoom_level /= 1.2
-        self.render_page()
+        self._draw_search_highlight()
+        if "first_page" not in self.startup:
+            self.startup["first_page"] = None  # claimed; timed once the page is painted
+            self.root.after_idle(self._mark_startup, "first_page")
+
+    def _page_size(self):
+        from unredact_viewer import FITZ_LOCK, file_key
+        key = (file_key(self.current_pdf_path), self.current_page_num)
+        if key not in self.page_rects:
+            with FITZ_LOCK:
+                self.current_pdf_doc = self.doc_pool.get(self.current_pdf_path)
+                r = self.current_pdf_doc.load_page(self.current_page_num).rect
+            self.page_rects[key] = (r.width, r.height)
+        return self.page_rects[key]
+
+    def _render_full(self):
+        from unredact_viewer import FITZ_LOCK, file_key, render_frame, zoom_key
+        self.tile_state = None
+        self.tile_images = {}
+        key = (file_key(self.current_pdf_path), self.current_page_num, zoom_key(self.zoom_level))
+        frame = self.page_cache.get(key)
+        if frame is None:
+            with FITZ_LOCK:
+                self.current_pdf_doc = self.doc_pool.get(self.current_pdf_path)
+                frame = render_frame(self.current_pdf_doc, self.current_page_num, self.zoom_level)
+            self.page_cache.put(key, frame)
+        self.tk_image_ref = frame_photo(frame, self.tk_image_ref)
+        self.shown_frame, self.interim_ref = (frame, self.zoom_level), None
+        c = self.preview_canvas
+        cx = max(0, (int(c.winfo_width()) - frame[0]) // 2)
+        self.page_origin = (cx, 10)
+        if self.page_item is None:
+            c.delete("all")
+            self.page_item = c.create_image(cx, 10, image=self.tk_image_ref, anchor="nw")
+        else:
+            c.coords(self.page_item, cx, 10)
+            c.itemconfigure(self.page_item, image=self.tk_image_ref)
+        c.config(scrollregion=c.bbox("all"))
+        self._prefetch_neighbours()
+
+    # --- TILED RENDER ---
+    def _render_tiled(self, width, height):
+        """Lay out a page too large for one bitmap and draw only the tiles in view."""
+        from unredact_viewer import file_key, zoom_key
+        c = self.preview_canvas
+        c.delete("all")
+        self.page_item = self.shown_frame = None
+        self.tile_images = {}
+        cw = int(c.winfo_width())
+        ox, oy = max(0, (cw - width) // 2), 10
+        self.page_origin = (ox, oy)
+        base = (file_key(self.current_pdf_path), self.current_page_num, zoom_key(self.zoom_level))
+        self.tile_state = {"base": base, "page": self.current_page_num, "zoom": self.zoom_level,
+                           "size": (width, height), "origin": (ox, oy)}
+        c.config(scrollregion=(0, 0, max(cw, ox + width), oy + height + 10))
+        self._update_tiles()
+
+    def _update_tiles(self):
+        from unredact_viewer import FITZ_LOCK, TILE_SIZE, render_tile, visible_tiles
+        self._tile_job = None
+        st = self.tile_state
+        if not st: return
+        c = self.preview_canvas
+        (width, height), (ox, oy) = st["size"], st["origin"]
+        x0, y0 = c.canvasx(0) - ox, c.canvasy(0) - oy
+        wanted = visible_tiles(x0, y0, x0 + c.winfo_width(), y0 + c.winfo_height(), width, height)
+        keep = set(wanted)
+        for t in [t for t in self.tile_images if t not in keep]:
+            c.delete(self.tile_images.pop(t)[0])
+        for col, row in wanted:
+            if (col, row) in self.tile_images: continue
+            key = st["base"] + ("tile", col, row)
+            frame = self.page_cache.get(key)
+            if frame is None:
+                with FITZ_LOCK:
+                    self.current_pdf_doc = self.doc_pool.get(self.current_pdf_path)
+                    frame = render_tile(self.current_pdf_doc, st["page"], st["zoom"], col, row)
+                self.page_cache.put(key, frame)
+            img = frame_photo(frame)
+            item = c.create_image(ox + col * TILE_SIZE, oy + row * TILE_SIZE, image=img, anchor="nw")
+            self.tile_images[(col, row)] = (item, img)
+        c.tag_raise("hit")
+
+    def _schedule_tile_update(self):
+        if self.tile_state and not self._tile_job:
+            self._tile_job = self.root.after(15, self._update_tiles)
+
+    def on_canvas_yview(self, *args):
+        self.preview_canvas.yview(*args)
+        self._schedule_tile_update()
+
+    def on_canvas_xview(self, *args):
+        self.preview_canvas.xview(*args)
+        self._schedule_tile_update()
+
+    def _prefetch_neighbours(self):
+        path, p, z = self.current_pdf_path, self.current_page_num, self.zoom_level
+        targets = [(path, p + 1, z), (path, p - 1, z), (path, p + 2, z)]
+        sel = self.file_listbox.curselection()
+        if sel:
+            target_dir = self.viewer_dir if self.viewer_dir else self.output_dir.get()
+            for idx in (sel[0] + 1, sel[0] - 1):
+                if 0 <= idx < len(self.viewer_files):
+                    targets.append((os.path.join(target_dir, self.viewer_files[idx]), 0, z))
+        self.prefetcher.request(targets)
+
+    def zoom_in(self): self.set_zoom(self.zoom_level * 1.2)
+    def zoom_out(self): self.set_zoom(self.zoom_level / 1.2)
     def fit_width(self):
         if not self.current_pdf_doc: return
-        page = self.current_pdf_doc.load_page(self.current_page_num)
         canvas_width = self.preview_canvas.winfo_width()
-        if canvas_width > 50:
-            self.zoom_level = (canvas_width - 40) / page.rect.width
-            self.render_page()
+        if canvas_width > 50: self.set_zoom((canvas_width - 40) / self._page_size()[0])
+
+    def set_zoom(self, zoom):
+        """Coalesce zoom requests: show a quick rescale now, render properly once input settles."""
+        if not self.current_pdf_doc: return
+        self.zoom_level = zoom
+        self.lbl_zoom.config(text=f"{int(zoom * 100)}%")
+        self.prefetcher.request([])  # drop neighbour renders queued at the old zoom
+        self._show_interim_zoom()
+        if self._zoom_job: self.root.after_cancel(self._zoom_job)
+        self._zoom_job = self.root.after(ZOOM_SETTLE_MS, self._apply_zoom)
+
+    def _apply_zoom(self):
+        self._zoom_job = None
+        self.render_page()
+
+    def _show_interim_zoom(self):
+        """Stretch the frame already on screen to the pending zoom; a placeholder until the real render."""
+        from unredact_viewer import TILED_MIN_PIXELS
+        if not self.shown_frame or self.page_item is None: return
+        frame, shown_zoom = self.shown_frame
+        scale = self.zoom_level / shown_zoom
+        width, height = max(1, int(frame[0] * scale)), max(1, int(frame[1] * scale))
+        if width * height > TILED_MIN_PIXELS: return
+        if ImageTk is not None:
+            im = Image.frombuffer("RGB", frame[:2], frame[2], "raw", "RGB", 0, 1)
+            self.interim_ref = ImageTk.PhotoImage(im.resize((width, height), Image.NEAREST))
+        else:
+            # Tk only scales by whole factors; anything in between keeps the old frame until the render
+            if scale >= 2: self.interim_ref = self.tk_image_ref.zoom(int(scale))
+            elif scale <= 0.5: self.interim_ref = self.tk_image_ref.subsample(int(1 / scale))
+            else: return
+            width = self.interim_ref.width()
+        c = self.preview_canvas
+        c.coords(self.page_item, max(0, (int(c.winfo_width()) - width) // 2), 10)
+        c.itemconfigure(self.page_item, image=self.interim_ref)
+        c.delete("hit")
+        c.config(scrollregion=c.bbox("all"))
     def on_mousewheel_zoom(self, event):
-        if event.delta > 0: self.zoom_in()
-        else: self.zoom_out()
+        self.set_zoom(self.zoom_level * (1.2 if event.delta > 0 else 1 / 1.2))
 
     def next_page(self):
-        if self.current_pdf_doc and self.current_page_num < self.current_pdf_doc.page_count - 1:
+        if self.current_pdf_doc and self.current_page_num < self.current_page_count - 1:
             self.current_page_num += 1
             self.render_page()
             self.update_nav_buttons()
@@ -561,7 +1105,7 @@ class ProfessionalUnredactApp:
     def update_nav_buttons(self):
         if not self.current_pdf_doc: return
         self.btn_prev_p.config(state="normal" if self.current_page_num > 0 else "disabled")
-        self.btn_next_p.config(state="normal" if self.current_page_num < self.current_pdf_doc.page_count - 1 else "disabled")
+        self.btn_next_p.config(state="normal" if self.current_page_num < self.current_page_count - 1 else "disabled")
 
     def toggle_fullscreen(self):
         self.is_fullscreen = not self.is_fullscreen
@@ -574,14 +1118,28 @@ class ProfessionalUnredactApp:
         sel = self.file_listbox.curselection()
         if not sel: return
         target_dir = self.viewer_dir if self.viewer_dir else self.output_dir.get()
-        path = os.path.join(target_dir, self.file_listbox.get(sel[0]))
+        path = os.path.join(target_dir, self.viewer_files[sel[0]])
         try:
             if platform.system() == "Windows": os.startfile(path)
             elif platform.system() == "Darwin": subprocess.Popen(["open", path])
             else: subprocess.Popen(["xdg-open", path])
         except: pass
 
-if __name__ == "__main__":
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog="redact_extract", description="PDF unredactor dashboard and results viewer.")
+    ap.add_argument("path", nargs="?", help="folder or PDF to open in the results viewer")
+    ap.add_argument("--viewer", action="store_true", help="open only the results viewer, without the processing dashboard")
+    ap.add_argument("--startup-timing", action="store_true",
+                    help="print the time to the first window and to the first rendered page")
+    ap.add_argument("--quit-after-startup", action="store_true",
+                    help="exit once the window is up (or the given PDF is shown), for startup benchmarks")
+    args = ap.parse_args(argv)
     root = tk.Tk()
-    app = ProfessionalUnredactApp(root)
+    app = ProfessionalUnredactApp(root, viewer_only=args.viewer, open_path=args.path, show_timing=args.startup_timing,
+                                  quit_after_startup=args.quit_after_startup)
     root.mainloop()
+    return 1 if app.startup_error else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,607 @@
+"""Benchmarks and comparison harnesses for the unredaction engine.
+
+    python -m unredact_bench backends ./corpus --json backends.json
+    python -m unredact_bench display ./corpus/big.pdf --zoom 1 2 4
+    python -m unredact_bench corpus ./synthetic --files 5 --pages 50 --coverage 0.3
+    python -m unredact_bench suite ./synthetic --json before.json
+    python -m unredact_bench compare before.json after.json
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import random
+import difflib
+import platform
+import tempfile
+import subprocess
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+import fitz  # PyMuPDF
+
+from unredact_engine import MODES, EngineConfig, UnredactEngine, expand_inputs
+from unredact_viewer import render_frame
+from unredact_lines import group_columns, group_lines, fitz_page_columns, fitz_page_words, numpy_module
+
+np = numpy_module()
+
+
+# --- BACKEND COMPARISON ---
+def compare_backends(path, tol=3.0):
+    """Time both extraction backends on one file and measure how closely their text agrees."""
+    timings, data = {}, {}
+    for backend in ("pdfplumber", "pymupdf"):
+        engine = UnredactEngine(EngineConfig(backend=backend, line_tolerance=tol))
+        t0 = time.perf_counter()
+        data[backend] = engine.extract_lines(path)
+        timings[backend] = time.perf_counter() - t0
+
+    ref, new = data["pdfplumber"], data["pymupdf"]
+    identical, ratios, max_shift = 0, [], 0.0
+    for p_ref, p_new in zip(ref, new):
+        t_ref, t_new = [l[0] for l in p_ref], [l[0] for l in p_new]
+        if t_ref == t_new:
+            identical += 1
+            for a, b in zip(p_ref, p_new):
+                max_shift = max(max_shift, abs(a[1] - b[1]), abs(a[2] - b[2]))
+        ratios.append(difflib.SequenceMatcher(None, "\n".join(t_ref), "\n".join(t_new), autojunk=False).ratio())
+    pages = len(ref)
+    return {"file": path, "pages": pages, "page_count_match": len(ref) == len(new),
+            "pdfplumber_sec": timings["pdfplumber"], "pymupdf_sec": timings["pymupdf"],
+            "speedup": timings["pdfplumber"] / timings["pymupdf"] if timings["pymupdf"] > 0 else 0.0,
+            "identical_pages": identical, "text_similarity": sum(ratios) / len(ratios) if ratios else 1.0,
+            "max_coord_shift": max_shift}
+
+
+def run_backends(args):
+    rows = []
+    print(f"{'file':40} {'pages':>6} {'plumber s':>10} {'pymupdf s':>10} {'speedup':>8} {'same pages':>11} {'similarity':>10}")
+    for f in expand_inputs(args.inputs):
+        try:
+            r = compare_backends(f, args.tolerance)
+        except Exception as e:
+            print(f"{f[-40:]:40} error: {e}")
+            continue
+        rows.append(r)
+        print(f"{r['file'][-40:]:40} {r['pages']:>6} {r['pdfplumber_sec']:>10.2f} {r['pymupdf_sec']:>10.2f} "
+              f"{r['speedup']:>7.1f}x {r['identical_pages']:>5}/{r['pages']:<5} {r['text_similarity']:>10.4f}")
+    if rows:
+        ref = sum(r["pdfplumber_sec"] for r in rows)
+        new = sum(r["pymupdf_sec"] for r in rows)
+        pages = sum(r["pages"] for r in rows)
+        print(f"TOTAL: {pages} pages | pdfplumber {pages / ref:.1f} pages/sec | pymupdf {pages / new:.1f} pages/sec | "
+              f"{ref / new:.1f}x | {sum(r['identical_pages'] for r in rows)}/{pages} pages identical")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as fh:
+            json.dump(rows, fh, indent=2)
+    return 0
+
+
+# --- LINE ASSEMBLY ---
+def synthetic_words(n_words, columns=1, seed=0):
+    """A dense page of ``n_words`` small-font words, optionally laid out in columns."""
+    rng = random.Random(seed)
+    per_row = max(1, n_words // 400)
+    col_w = 600.0 / columns
+    words, top = [], 20.0
+    while len(words) < n_words:
+        for c in range(columns):
+            x = 20 + c * col_w
+            for _ in range(max(1, per_row // columns)):
+                w = rng.uniform(8, 30)
+                words.append({"text": rng.choice(("lorem", "ipsum", "12.50", "Smith", "Exhibit")), "x0": x, "x1": x + w,
+                              "top": top + rng.uniform(-0.8, 0.8), "size": 6.0})
+                x += w + 2
+        top += 7.0
+    rng.shuffle(words)
+    return words[:n_words]
+
+
+def bench_lines(words, tol, column_gap, repeats):
+    """Best-of-``repeats`` timings for the original dict loop and the NumPy builder on dicts and on columns."""
+    columns = ([w["text"] for w in words], [w["x0"] for w in words], [w["x1"] for w in words],
+               [w["top"] for w in words], [w["size"] for w in words])
+    variants = [("python", lambda: group_lines(words, tol, column_gap, use_numpy=False))]
+    if np is not None:
+        variants += [("numpy", lambda: group_lines(words, tol, column_gap, use_numpy=True)),
+                     ("numpy_columns", lambda: group_columns(columns, tol, column_gap, use_numpy=True))]
+    out = {}
+    for label, fn in variants:
+        best = float("inf")
+        for _ in range(repeats):
+            t0 = time.perf_counter()
+            res = fn()
+            best = min(best, time.perf_counter() - t0)
+        out[label] = (best, res)
+    return out
+
+
+def boundary_words(n_cases=500, seed=0):
+    """Small pages whose tops sit exactly ``tol`` apart or one rounding step either side of it,
+    with repeated tops and x0s, where the NumPy line starts are most likely to drift from the loop's."""
+    rng = random.Random(seed)
+    cases = [[{"text": "a", "x0": 10.0, "x1": 20.0, "top": 16.8, "size": 6.0},
+              {"text": "b", "x0": 30.0, "x1": 40.0, "top": 19.8, "size": 6.0}]]
+    for _ in range(n_cases):
+        base = round(rng.uniform(0, 800), rng.choice((0, 1, 2)))
+        tops = [base]
+        for _ in range(rng.randint(2, 30)):
+            step = rng.choice((0.0, 3.0, 3.0, 1.5, 0.1, 0.3, 2.9, 3.1))
+            tops.append(round(tops[-1] + step, rng.choice((1, 2))))
+        words = [{"text": f"w{i}", "x0": float(rng.choice((10, 20, 20, 30))), "x1": 50.0, "top": t, "size": 6.0}
+                 for i, t in enumerate(tops)]
+        rng.shuffle(words)
+        cases.append(words)
+    return cases
+
+
+def check_lines(tol):
+    """Number of boundary pages on which the NumPy builder disagrees with the pure-Python loop."""
+    bad = 0
+    for words in boundary_words():
+        for gap in (0.0, 5.0):
+            if group_lines(words, tol, gap, use_numpy=False) != group_lines(words, tol, gap, use_numpy=True): bad += 1
+    return bad
+
+
+def run_lines(args):
+    if np is None: print("NumPy is not installed; only the pure-Python path will be timed.")
+    else:
+        bad = check_lines(args.tolerance)
+        print(f"boundary check: {'ok' if not bad else f'{bad} pages differ between the NumPy and Python builders'}")
+        if bad: return 1
+    cases = []
+    for f in expand_inputs(args.inputs or []):
+        with fitz.open(f) as doc:
+            page = max(doc, key=lambda p: len(p.get_text("words")))
+            cases.append((f"{f[-30:]} p{page.number + 1}", fitz_page_words(page)))
+    if not cases:
+        cases = [(f"synthetic {n} words x{args.columns} cols", synthetic_words(n, args.columns)) for n in args.words]
+
+    rows = []
+    print(f"{'case':40} {'words':>7} {'python ms':>10} {'numpy ms':>9} {'columns ms':>10} {'speedup':>8} {'same':>5}")
+    for label, words in cases:
+        r = bench_lines(words, args.tolerance, args.column_gap, args.repeats)
+        py = r["python"]
+        row = {"case": label, "words": len(words), "python_ms": py[0] * 1000}
+        if "numpy" in r:
+            nm, nc = r["numpy"], r["numpy_columns"]
+            row.update(numpy_ms=nm[0] * 1000, numpy_columns_ms=nc[0] * 1000, identical=nm[1] == py[1] == nc[1])
+            print(f"{label[:40]:40} {len(words):>7} {row['python_ms']:>10.2f} {row['numpy_ms']:>9.2f} "
+                  f"{row['numpy_columns_ms']:>10.2f} {py[0] / nc[0]:>7.1f}x {str(row['identical']):>5}")
+        else:
+            print(f"{label[:40]:40} {len(words):>7} {row['python_ms']:>10.2f}")
+        rows.append(row)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as fh:
+            json.dump(rows, fh, indent=2)
+    return 0
+
+
+# --- TEXT WRITER ---
+def bench_writer(doc, page_no, cols, repeats, tol=3.0):
+    """Best-of-``repeats`` seconds and output bytes for drawing one page with each text writer."""
+    p_data = group_columns(cols, tol)
+    variants = [("per_line", EngineConfig(text_writer="per_line")), ("batched", EngineConfig(text_writer="batched")),
+                ("fit_words", EngineConfig(text_writer="batched", fit_words=True))]
+    out = {}
+    for label, config in variants:
+        engine = UnredactEngine(config)
+        best, size = float("inf"), 0
+        for _ in range(repeats):
+            dst = fitz.open()
+            page = doc.load_page(page_no)
+            t0 = time.perf_counter()
+            engine._write_page(dst, doc, page, p_data, cols)
+            best = min(best, time.perf_counter() - t0)
+            size = len(dst.tobytes(garbage=1, deflate=True))
+            dst.close()
+        out[label] = (best, size)
+    return len(p_data), out
+
+
+def run_writer(args):
+    cases = []
+    for f in expand_inputs(args.inputs or []):
+        doc = fitz.open(f)
+        page = max(doc, key=lambda p: len(p.get_text("words")))
+        cases.append((f"{f[-30:]} p{page.number + 1}", doc, page.number, fitz_page_columns(page)))
+    if not cases:
+        for n in args.words:
+            doc = fitz.open()
+            doc.new_page()
+            words = synthetic_words(n)
+            cols = tuple([w[k] for w in words] for k in ("text", "x0", "x1", "top", "size"))
+            cases.append((f"synthetic {n} words", doc, 0, cols))
+
+    rows = []
+    print(f"{'case':40} {'lines':>6} {'per-line ms':>12} {'batched ms':>11} {'fit ms':>8} {'speedup':>8} {'KB per-line/batched':>20}")
+    for label, doc, page_no, cols in cases:
+        n_lines, r = bench_writer(doc, page_no, cols, args.repeats)
+        (pl, pl_size), (bt, bt_size), (ft, _) = r["per_line"], r["batched"], r["fit_words"]
+        rows.append({"case": label, "words": len(cols[0]), "lines": n_lines, "per_line_ms": pl * 1000, "batched_ms": bt * 1000,
+                     "fit_words_ms": ft * 1000, "per_line_bytes": pl_size, "batched_bytes": bt_size})
+        print(f"{label[:40]:40} {n_lines:>6} {pl * 1000:>12.1f} {bt * 1000:>11.1f} {ft * 1000:>8.1f} {pl / bt:>7.1f}x "
+              f"{pl_size / 1024:>10.0f}/{bt_size / 1024:<9.0f}")
+        doc.close()
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as fh:
+            json.dump(rows, fh, indent=2)
+    return 0
+
+
+# --- DISPLAY LATENCY ---
+def bench_display(path, page_no, zooms, repeats):
+    """Best-of-``repeats`` milliseconds from rasterizing a page to the frame being on a Tk canvas,
+    for the old PPM round-trip and the raw-sample path the viewer now uses."""
+    import tkinter as tk
+    from unredact_viewer import render_frame
+    try:
+        root = tk.Tk()
+        root.withdraw()
+        canvas = tk.Canvas(root)
+    except tk.TclError:
+        root = canvas = None  # headless: only the encode side can be timed
+
+    def ppm_path(page, zoom, state):
+        pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom))
+        data = pix.tobytes("ppm")
+        if canvas is None: return
+        state["img"] = tk.PhotoImage(data=data)
+        canvas.delete("all")
+        canvas.create_image(0, 0, image=state["img"], anchor="nw")
+        root.update_idletasks()
+
+    def raw_path(page, zoom, state):
+        frame = render_frame(page.parent, page.number, zoom)
+        if canvas is None: return
+        from redact_extract import frame_photo
+        state["img"] = frame_photo(frame, state.get("img"))
+        if "item" not in state: state["item"] = canvas.create_image(0, 0, image=state["img"], anchor="nw")
+        canvas.itemconfigure(state["item"], image=state["img"])
+        root.update_idletasks()
+
+    rows = []
+    with fitz.open(path) as doc:
+        page = doc.load_page(page_no)
+        for zoom in zooms:
+            row = {"file": path, "page": page_no + 1, "zoom": zoom, "tk": canvas is not None}
+            for label, fn in (("ppm", ppm_path), ("raw", raw_path)):
+                state, best = {}, float("inf")
+                for _ in range(repeats):
+                    t0 = time.perf_counter()
+                    fn(page, zoom, state)
+                    best = min(best, time.perf_counter() - t0)
+                row[f"{label}_ms"] = best * 1000
+            rows.append(row)
+    if root is not None: root.destroy()
+    return rows
+
+
+def run_display(args):
+    files = expand_inputs(args.inputs)
+    if not files:
+        print("No PDFs found.")
+        return 1
+    rows = bench_display(files[0], args.page - 1, args.zoom, args.repeats)
+    if not rows[0]["tk"]: print("No display available: timing rasterize + encode only, without the Tk handoff.")
+    print(f"{'zoom':>6} {'ppm round-trip ms':>18} {'raw samples ms':>15} {'speedup':>8}")
+    for r in rows:
+        print(f"{r['zoom']:>6.2f} {r['ppm_ms']:>18.1f} {r['raw_ms']:>15.1f} {r['ppm_ms'] / r['raw_ms']:>7.2f}x")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as fh:
+            json.dump(rows, fh, indent=2)
+    return 0
+
+
+# --- STARTUP ---
+GUI_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "redact_extract.py")
+
+
+GUI_TIMEOUT = 60  # seconds before a GUI run that never reaches its startup stage is abandoned
+
+
+def bench_startup(path, viewer_only, repeats):
+    """Median seconds to the first mapped window and, given a PDF or folder, to its first rendered page,
+    plus the bare module import. Each run is a fresh interpreter so nothing is already imported.
+    Stops at the first GUI run that fails (no display, nothing to show) instead of repeating it."""
+    cmd = [sys.executable, "-W", "ignore", "-c",
+           "import time; t = time.perf_counter(); import redact_extract; print(time.perf_counter() - t)"]
+    gui = [sys.executable, "-W", "ignore", GUI_SCRIPT, "--startup-timing", "--quit-after-startup"]
+    gui += ["--viewer"] * viewer_only + ([path] if path else [])
+    cwd = os.path.dirname(GUI_SCRIPT)
+    imports, stages, error = [], {}, None
+    for _ in range(repeats):
+        out = subprocess.run(cmd, capture_output=True, text=True, cwd=cwd)
+        imports.append(float(out.stdout.strip().splitlines()[-1]))
+        if error: continue
+        try:
+            run = subprocess.run(gui, capture_output=True, text=True, cwd=cwd, timeout=GUI_TIMEOUT)
+        except subprocess.TimeoutExpired:
+            error = f"no startup stage reached within {GUI_TIMEOUT}s"
+            continue
+        if run.returncode:
+            error = (run.stderr.strip().splitlines() or ["exit code %d" % run.returncode])[-1]
+            continue
+        for line in run.stderr.splitlines():
+            if line.startswith("startup: "):
+                stage, secs = line[9:].split(" after ")
+                stages.setdefault(stage, []).append(float(secs.rstrip("s")))
+    median = lambda v: sorted(v)[len(v) // 2]
+    row = {"path": path, "viewer_only": viewer_only, "import_seconds": median(imports)}
+    row.update({f"{k}_seconds": median(v) for k, v in stages.items()})
+    if error: row["gui_error"] = error
+    return row
+
+
+def run_startup(args):
+    if args.path and not expand_inputs([args.path], recursive=False):
+        print(f"No PDFs found in {args.path}.")
+        return 1
+    rows = [bench_startup(args.path, v, args.repeats) for v in (False, True)]
+    for r in rows:
+        label = "viewer only" if r["viewer_only"] else "full app"
+        text = f"{label:12}"
+        if "window_seconds" in r: text += f" first window {r['window_seconds']:.3f}s |"
+        if "first_page_seconds" in r: text += f" first page {r['first_page_seconds']:.3f}s |"
+        text += f" import only {r['import_seconds']:.3f}s"
+        if r.get("gui_error"): text += f" | GUI not timed: {r['gui_error']}"
+        print(text)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as fh:
+            json.dump({"environment": environment_info(), "results": rows}, fh, indent=2)
+    return 0 if all("window_seconds" in r for r in rows) else 1
+
+
+# --- SYNTHETIC CORPUS ---
+PAGE_SIZES = {"letter": (612, 792), "a4": (595, 842), "legal": (612, 1008), "tabloid": (792, 1224)}
+VOCAB = ("the", "of", "and", "Smith", "John", "account", "Exhibit", "12.50", "2019-04-01", "confidential", "witness",
+         "payment", "transfer", "Ms.", "Jones", "deposition", "agreement", "wire", "redacted", "counsel")
+
+
+def page_size(spec):
+    """``"letter"``/``"a4"``/... or ``"WxH"`` in points."""
+    if spec in PAGE_SIZES: return PAGE_SIZES[spec]
+    w, h = spec.lower().split("x")
+    return float(w), float(h)
+
+
+def make_redacted_pdf(path, pages=10, words_per_page=300, font_sizes=(9.0, 12.0), coverage=0.2,
+                      size=(612, 792), seed=0):
+    """Write a PDF of random text lines with black boxes drawn over roughly ``coverage``
+    of the lines. The text stays in the content stream under the boxes, like a cosmetic redaction."""
+    rng = random.Random(seed)
+    font = fitz.Font("helv")
+    doc = fitz.open()
+    boxes = 0
+    for _ in range(pages):
+        page = doc.new_page(width=size[0], height=size[1])
+        tw = fitz.TextWriter(page.rect)
+        margin, y, placed, redact = 36.0, 36.0, 0, []
+        while placed < words_per_page:
+            fs = rng.uniform(*font_sizes)
+            y += fs * 1.3
+            if y > size[1] - margin: break
+            x, line = margin, []
+            while placed < words_per_page:
+                word = rng.choice(VOCAB)
+                w = font.text_length(word, fontsize=fs)
+                if x + w > size[0] - margin: break
+                tw.append((x, y), word, font=font, fontsize=fs)
+                line.append((x, x + w))
+                x += w + font.text_length(" ", fontsize=fs)
+                placed += 1
+            if line and rng.random() < coverage:
+                a = rng.randrange(len(line))
+                b = min(len(line), a + rng.randint(1, 4))
+                redact.append(fitz.Rect(line[a][0] - 1, y - fs, line[b - 1][1] + 1, y + fs * 0.3))
+        tw.write_text(page)
+        for r in redact: page.draw_rect(r, color=None, fill=(0, 0, 0))
+        boxes += len(redact)
+    doc.save(path, garbage=1, deflate=True)
+    doc.close()
+    return boxes
+
+
+def run_corpus(args):
+    os.makedirs(args.output_dir, exist_ok=True)
+    spec = {"files": args.files, "pages": args.pages, "words_per_page": args.words, "font_sizes": args.font_sizes,
+            "coverage": args.coverage, "page_size": args.page_size, "seed": args.seed, "files_written": []}
+    for k in range(args.files):
+        path = os.path.join(args.output_dir, f"synthetic_{k:04d}.pdf")
+        boxes = make_redacted_pdf(path, args.pages, args.words, tuple(args.font_sizes), args.coverage,
+                                  page_size(args.page_size), args.seed + k)
+        spec["files_written"].append({"file": os.path.basename(path), "bytes": os.path.getsize(path), "boxes": boxes})
+        print(f"{path}: {args.pages} pages, {boxes} redaction boxes")
+    with open(os.path.join(args.output_dir, "corpus.json"), "w", encoding="utf-8") as fh:
+        json.dump(spec, fh, indent=2)
+    return 0
+
+
+# --- STAGE SUITE ---
+STAGES = ("extract", "group", "write", "save", "render")
+
+
+def peak_rss_mb():
+    if resource is None: return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024  # bytes on macOS, KiB elsewhere
+
+
+def suite_mode(files, mode, zoom):
+    """Stage timings for one mode over ``files``, then an end-to-end ``process_pdf`` pass.
+    Run in a fresh process so peak RSS belongs to this mode alone."""
+    engine = UnredactEngine(EngineConfig(mode=mode, search_index=False, skip_unchanged=False, page_cache="off"))
+    stages = dict.fromkeys(STAGES, 0.0)
+    pages = words = out_bytes = 0
+    for f in files:
+        with fitz.open(f) as doc:
+            out = fitz.open()
+            for page in doc:
+                t0 = time.perf_counter()
+                cols = engine._page_columns(page, None, None)
+                t1 = time.perf_counter()
+                p_data = group_columns(cols, engine.config.line_tolerance, engine.config.column_gap)
+                t2 = time.perf_counter()
+                engine._write_page(out, doc, page, p_data, cols)
+                t3 = time.perf_counter()
+                stages["extract"] += t1 - t0
+                stages["group"] += t2 - t1
+                stages["write"] += t3 - t2
+                pages += 1
+                words += len(cols[0])
+            t0 = time.perf_counter()
+            data = out.tobytes(**engine._save_options())
+            stages["save"] += time.perf_counter() - t0
+            out_bytes += len(data)
+            with fitz.open("pdf", data) as rendered:
+                t0 = time.perf_counter()
+                for i in range(rendered.page_count): render_frame(rendered, i, zoom)
+                stages["render"] += time.perf_counter() - t0
+            out.close()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine.config.output_dir = tmp
+        t0 = time.perf_counter()
+        for f in files: engine.process_pdf(f)
+        e2e = time.perf_counter() - t0
+
+    staged = sum(v for k, v in stages.items() if k != "render")
+    return {"mode": mode, "files": len(files), "pages": pages, "words": words, "output_bytes": out_bytes,
+            "stage_seconds": stages, "stage_pages_per_sec": {k: pages / v if v > 0 else None for k, v in stages.items()},
+            "pipeline_pages_per_sec": pages / staged if staged > 0 else None,
+            "process_pdf_seconds": e2e, "process_pdf_pages_per_sec": pages / e2e if e2e > 0 else None,
+            "peak_rss_mb": peak_rss_mb()}
+
+
+def environment_info():
+    info = {"python": platform.python_version(), "pymupdf": fitz.VersionBind, "numpy": np.__version__ if np is not None else None,
+            "platform": platform.platform(), "timestamp": datetime.now().isoformat(timespec="seconds"), "commit": None}
+    try:
+        info["commit"] = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                        cwd=os.path.dirname(os.path.abspath(__file__)), timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        pass
+    return info
+
+
+def run_suite(args):
+    files = expand_inputs(args.inputs)
+    if not files:
+        print("No PDFs found.")
+        return 1
+    rows = []
+    for mode in args.modes:
+        with ProcessPoolExecutor(max_workers=1) as pool:
+            r = pool.submit(suite_mode, files, mode, args.zoom).result()
+        rows.append(r)
+        st = r["stage_seconds"]
+        print(f"{mode:14} {r['pages']:>6} pages | " + " ".join(f"{k} {st[k] * 1000 / r['pages']:.2f}" for k in STAGES)
+              + f" ms/page | process_pdf {r['process_pdf_pages_per_sec']:.1f} pages/sec | "
+              f"{r['output_bytes'] / 1e6:.1f} MB | peak RSS {r['peak_rss_mb'] or 0:.0f} MB")
+    results = {"environment": environment_info(), "inputs": files, "zoom": args.zoom, "results": rows}
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as fh:
+            json.dump(results, fh, indent=2)
+    return 0
+
+
+def run_compare(args):
+    """Print per-stage changes between two ``suite`` result files."""
+    with open(args.before, encoding="utf-8") as fh: before = {r["mode"]: r for r in json.load(fh)["results"]}
+    with open(args.after, encoding="utf-8") as fh: after = {r["mode"]: r for r in json.load(fh)["results"]}
+    print(f"{'mode':14} {'metric':22} {'before':>10} {'after':>10} {'change':>8}")
+    for mode in after:
+        if mode not in before: continue
+        a, b = before[mode], after[mode]
+        metrics = [(f"{k} ms/page", a["stage_seconds"][k] * 1000 / a["pages"], b["stage_seconds"][k] * 1000 / b["pages"]) for k in STAGES]
+        metrics += [("process_pdf pages/sec", a["process_pdf_pages_per_sec"], b["process_pdf_pages_per_sec"]),
+                    ("output MB", a["output_bytes"] / 1e6, b["output_bytes"] / 1e6),
+                    ("peak RSS MB", a["peak_rss_mb"], b["peak_rss_mb"])]
+        for name, x, y in metrics:
+            if x is None or y is None: continue
+            print(f"{mode:14} {name:22} {x:>10.2f} {y:>10.2f} {(y - x) / x * 100 if x else 0:>+7.1f}%")
+    return 0
+
+
+# --- CLI ---
+def build_arg_parser():
+    ap = argparse.ArgumentParser(prog="unredact_bench", description="Benchmarks for the unredaction engine.")
+    sub = ap.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("backends", help="compare pdfplumber and PyMuPDF extraction speed and text")
+    p.add_argument("inputs", nargs="+", help="PDF files, folders or glob patterns")
+    p.add_argument("--tolerance", type=float, default=3.0, help="line grouping tolerance in points")
+    p.add_argument("--json", help="write per-file results to this JSON file")
+    p.set_defaults(func=run_backends)
+
+    p = sub.add_parser("lines", help="microbenchmark the pure-Python and NumPy line builders")
+    p.add_argument("inputs", nargs="*", help="optional PDFs; the densest page of each is used instead of synthetic pages")
+    p.add_argument("--words", type=int, nargs="+", default=[1000, 5000, 20000, 50000], help="synthetic page sizes")
+    p.add_argument("--columns", type=int, default=1)
+    p.add_argument("--tolerance", type=float, default=3.0)
+    p.add_argument("--column-gap", type=float, default=0.0)
+    p.add_argument("--repeats", type=int, default=5)
+    p.add_argument("--json", help="write results to this JSON file")
+    p.set_defaults(func=run_lines)
+
+    p = sub.add_parser("writer", help="compare per-line insert_text with the batched TextWriter on dense pages")
+    p.add_argument("inputs", nargs="*", help="optional PDFs; the densest page of each is used instead of synthetic pages")
+    p.add_argument("--words", type=int, nargs="+", default=[2000, 10000, 20000], help="synthetic page sizes")
+    p.add_argument("--repeats", type=int, default=3)
+    p.add_argument("--json", help="write results to this JSON file")
+    p.set_defaults(func=run_writer)
+
+    p = sub.add_parser("corpus", help="generate synthetic PDFs with text left under black redaction boxes")
+    p.add_argument("output_dir")
+    p.add_argument("--files", type=int, default=5)
+    p.add_argument("--pages", type=int, default=20)
+    p.add_argument("--words", type=int, default=300, help="words per page")
+    p.add_argument("--font-sizes", type=float, nargs=2, default=[9.0, 12.0], metavar=("MIN", "MAX"))
+    p.add_argument("--coverage", type=float, default=0.2, help="fraction of lines with a redaction box")
+    p.add_argument("--page-size", default="letter", help=f"{', '.join(PAGE_SIZES)} or WxH in points")
+    p.add_argument("--seed", type=int, default=0)
+    p.set_defaults(func=run_corpus)
+
+    p = sub.add_parser("suite", help="time each pipeline stage per mode and write a results file")
+    p.add_argument("inputs", nargs="+", help="PDF files, folders or glob patterns (e.g. a generated corpus)")
+    p.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES))
+    p.add_argument("--zoom", type=float, default=1.5, help="viewer render zoom")
+    p.add_argument("--json", help="write results to this JSON file")
+    p.set_defaults(func=run_suite)
+
+    p = sub.add_parser("compare", help="show changes between two suite results files")
+    p.add_argument("before")
+    p.add_argument("after")
+    p.set_defaults(func=run_compare)
+
+    p = sub.add_parser("display", help="time render-to-screen latency for the PPM and raw-sample frame paths")
+    p.add_argument("inputs", nargs="+", help="PDF file (the first one found is used)")
+    p.add_argument("--page", type=int, default=1)
+    p.add_argument("--zoom", type=float, nargs="+", default=[1.0, 2.0, 4.0])
+    p.add_argument("--repeats", type=int, default=5)
+    p.add_argument("--json", help="write results to this JSON file")
+    p.set_defaults(func=run_display)
+
+    p = sub.add_parser("startup", help="time GUI startup: module import, first window and first rendered page")
+    p.add_argument("path", nargs="?", help="folder or PDF to open in the viewer, so the first page is timed too")
+    p.add_argument("--repeats", type=int, default=3)
+    p.add_argument("--json", help="write results to this JSON file")
+    p.set_defaults(func=run_startup)
+    return ap
+
+
+def main(argv=None):
+    args = build_arg_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,93 @@
+"""Redaction-box detection.
+
+Finds the regions of a ``fitz`` page that look redacted, i.e. filled dark
+rectangles drawn in the page content and redaction / filled square annotations,
+so the engine can restrict recovered text to those regions and pass through
+pages that have none.
+"""
+from bisect import bisect_left, bisect_right
+
+import fitz  # PyMuPDF
+
+from unredact_lines import numpy_module
+
+MAX_LIGHTNESS = 0.25  # fills at or below this (0 = black, 1 = white) count as redaction ink
+MIN_BOX_SIZE = 4.0  # points; thinner fills are rules, underlines and table borders
+MAX_PAGE_COVER = 0.9  # fills covering more of the page than this are backgrounds
+NUMPY_MIN_PAIRS = 20000  # word x box tests below which the array setup costs more than it saves
+MASK_CHUNK = 256  # words (in top order) tested per array block
+
+
+def _is_dark(color, opacity=1.0):
+    if not color or opacity < 0.5: return False
+    if len(color) == 1: return color[0] <= MAX_LIGHTNESS  # gray
+    if len(color) == 4: return 1 - min(1.0, color[3] + max(color[:3])) <= MAX_LIGHTNESS  # cmyk
+    return max(color) <= MAX_LIGHTNESS
+
+
+def find_redaction_boxes(page):
+    """Return ``(x0, top, x1, bottom)`` boxes for dark filled rectangles and redaction annotations."""
+    page_rect = page.rect
+    page_area = max(page_rect.width * page_rect.height, 1.0)
+    boxes = []
+
+    def keep(r):
+        if r.width >= MIN_BOX_SIZE and r.height >= MIN_BOX_SIZE and r.width * r.height <= MAX_PAGE_COVER * page_area:
+            boxes.append((r.x0, r.y0, r.x1, r.y1))
+
+    for d in page.get_drawings():
+        if "f" not in d.get("type", "") or not _is_dark(d.get("fill"), d.get("fill_opacity") or 1.0): continue
+        items = d.get("items", ())
+        if items and all(it[0] in ("re", "qu") for it in items):
+            for it in items:
+                keep(fitz.Rect(it[1]) if it[0] == "re" else it[1].rect)
+        else:
+            keep(fitz.Rect(d["rect"]))
+
+    for annot in page.annots() or ():
+        kind = annot.type[0]
+        if kind == fitz.PDF_ANNOT_REDACT or (kind == fitz.PDF_ANNOT_SQUARE and _is_dark(annot.colors.get("fill"))):
+            keep(annot.rect)
+    return boxes
+
+
+def overlap_mask(x0, x1, top, height, boxes, min_overlap=0.5):
+    """For each word, whether at least ``min_overlap`` of its box lies under one of ``boxes``."""
+    if not boxes: return [False] * len(x0)
+    np = numpy_module() if len(x0) * len(boxes) >= NUMPY_MIN_PAIRS else None
+    if np is not None: return _overlap_mask_numpy(np, x0, x1, top, height, boxes, min_overlap)
+    # Only boxes whose top lies in the word's vertical band (widened by the tallest box) can overlap it.
+    boxes = sorted(boxes, key=lambda bx: bx[1])
+    tops = [bx[1] for bx in boxes]
+    tallest = max(bx[3] - bx[1] for bx in boxes)
+    mask = []
+    for a, b, t, s in zip(x0, x1, top, height):
+        area = max((b - a) * s, 1e-6)
+        hit = False
+        for k in range(bisect_right(tops, t - tallest), bisect_left(tops, t + s)):
+            bx0, by0, bx1, by1 = boxes[k]
+            w = min(b, bx1) - max(a, bx0)
+            h = min(t + s, by1) - max(t, by0)
+            if w > 0 and h > 0 and w * h >= min_overlap * area:
+                hit = True
+                break
+        mask.append(hit)
+    return mask
+
+
+def _overlap_mask_numpy(np, x0, x1, top, height, boxes, min_overlap):
+    bx0, by0, bx1, by1 = np.asarray(boxes, dtype=float).T
+    x0, x1, top, height = (np.asarray(v, dtype=float) for v in (x0, x1, top, height))
+    mask = np.zeros(len(x0), dtype=bool)
+    # Words in top order, a horizontal band at a time, each tested only against the boxes crossing that band.
+    order = np.argsort(top, kind="stable")
+    for k in range(0, len(order), MASK_CHUNK):
+        rows = order[k:k + MASK_CHUNK]
+        a, b, t, s = (v[rows, None] for v in (x0, x1, top, height))
+        near = (by0 < (t + s).max()) & (by1 > t.min())
+        if not near.any(): continue
+        w = np.minimum(b, bx1[near]) - np.maximum(a, bx0[near])
+        h = np.minimum(t + s, by1[near]) - np.maximum(t, by0[near])
+        area = np.maximum((b - a) * s, 1e-6)
+        mask[rows] = ((w > 0) & (h > 0) & (w * h >= min_overlap * area)).any(axis=1)
+    return mask.tolist()
@@ -0,0 +1,979 @@
+"""Headless unredaction engine.
+
+Holds the extraction and writing pipeline used by the GUI so that batches can
+also be driven from scripts or the command line without a display:
+
+    python -m unredact_engine ./productions -o ./out --mode side_by_side -j 8
+"""
+import os
+import sys
+import glob
+import json
+import time
+import sqlite3
+import hashlib
+import queue
+import argparse
+import threading
+from dataclasses import dataclass, replace
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait, FIRST_COMPLETED
+from datetime import datetime
+from pathlib import Path
+
+import fitz  # PyMuPDF
+
+from unredact_lines import fitz_page_columns, group_columns, group_lines
+from unredact_detect import find_redaction_boxes, overlap_mask
+from unredact_manifest import Manifest, input_identity
+from unredact_index import SearchIndex, index_path_for
+from unredact_export import EXPORT_FORMATS, SidecarWriter, concat_sidecars, sidecar_path_for
+from unredact_pagecache import REF, PageCache, cache_path_for, page_key
+from unredact_limits import LimitExceeded, fallback_config, run_limited
+from unredact_options import MODES, BACKENDS, CLEAN_PAGE_MODES, SAVE_MODES, PAGE_CACHE_MODES, TEXT_WRITERS
+from unredact_metrics import BatchMetrics, StageTimer, merge_stats, metrics_path_for, run_profiled, slowest_report
+
+ENGINE_VERSION = "1.2"  # part of every manifest fingerprint: bump whenever a change alters what outputs contain
+IDLE = "<idle>"  # yielded by endless input iterables when no file is ready yet
+TEXT_BATCH = 200  # lines per TextWriter commit
+FIT_MIN_SCALE, FIT_MAX_SCALE = 0.5, 2.0  # font size limits when fitting words to their boxes
+
+
+@dataclass
+class EngineConfig:
+    output_dir: str = ""
+    mode: str = "side_by_side"
+    workers: int = 1
+    line_tolerance: float = 3.0
+    redacted_only: bool = False  # only re-insert words lying under detected redaction boxes
+    clean_pages: str = "process"  # pages without redactions: "process", "passthrough" (copy as-is) or "skip"
+    skip_unchanged: bool = True  # skip inputs the output folder's manifest already has current outputs for
+    search_index: bool = True  # record recovered lines in the output folder's full-text index
+    export: str = ""  # also write recovered lines as a "jsonl" or "columns" sidecar
+    write_pdf: bool = True  # False for text-only runs that produce just the sidecar
+    garbage: int = 1  # PDF garbage collection level 0-4; 3+ merges duplicate fonts, images and page XObjects
+    deflate: bool = True  # compress uncompressed content, font and image streams
+    object_streams: bool = True  # pack small objects into compressed object streams
+    text_writer: str = "batched"  # "batched" (one TextWriter per page) or "per_line" (insert_text per line)
+    fit_words: bool = False  # draw each word at its original box, sized to its original width
+    metrics: bool = True  # write a per-batch JSON metrics file under the output folder
+    profile_dir: str = ""  # when set, profile each file with cProfile and dump <name>.prof here
+    file_timeout: float = 0.0  # seconds one file (or shard) may run before it is killed; 0 is unlimited
+    max_memory_mb: int = 0  # address space the process running a file may add to its starting size; 0 is unlimited
+    max_pages: int = 0  # fail files with more pages than this up front; 0 is unlimited
+    fallback: bool = True  # retry files that broke a time or memory limit on a cheaper path
+    page_cache: str = "auto"  # reuse text extracted from identical pages: "on", "off", or "auto" (pdfplumber backend only)
+    page_cache_path: str = ""  # cache database; empty keeps it in the output folder
+    page_cache_mb: int = 512  # size budget of the page cache on disk
+    save_mode: str = "full"  # "full" rewrites flushed outputs compressed; "incremental" appends to them (larger); "linear" also linearizes
+    column_gap: float = 0.0  # split lines at horizontal gaps wider than this; 0 keeps whole rows together
+    backend: str = "pymupdf"
+    page_window: int = 4  # pages extracted ahead of the writer (pdfplumber backend)
+    flush_pages: int = 200  # append finished pages to disk this often; 0 keeps the whole output in memory
+    shard_threshold: int = 5000  # page count at which one file is split across workers
+    shard_pages: int = 0  # pages per shard; 0 splits evenly over the workers
+
+
+def output_path_for(input_path, output_dir):
+    return os.path.join(output_dir, f"UNREDACTED_{os.path.basename(input_path)}")
+
+
+def expand_inputs(patterns, recursive=True):
+    """Turn a mix of files, folders and glob patterns into a de-duplicated PDF list."""
+    seen, files = set(), []
+    for pat in patterns:
+        p = Path(pat)
+        if p.is_dir():
+            found = p.rglob("*.pdf") if recursive else p.glob("*.pdf")
+            hits = sorted(str(f) for f in found if f.is_file())
+        elif p.is_file():
+            hits = [str(p)]
+        else:
+            hits = sorted(f for f in glob.glob(pat, recursive=True) if f.lower().endswith(".pdf") and os.path.isfile(f))
+        for f in hits:
+            if f not in seen:
+                seen.add(f)
+                files.append(f)
+    return files
+
+
+def prefetch(iterable, window):
+    """Run ``iterable`` on a helper thread, keeping at most ``window`` items ready ahead of the consumer."""
+    if window <= 1:
+        yield from iterable
+        return
+    q = queue.Queue(maxsize=window)
+    stop = threading.Event()
+
+    def put(msg):
+        while not stop.is_set():
+            try:
+                q.put(msg, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def fill():
+        try:
+            for item in iterable:
+                if not put(("item", item)): return
+            put(("end", None))
+        except BaseException as e:
+            put(("error", e))
+        finally:
+            if hasattr(iterable, "close"): iterable.close()
+
+    t = threading.Thread(target=fill, daemon=True)
+    t.start()
+    try:
+        while True:
+            kind, item = q.get()
+            if kind == "end": return
+            if kind == "error": raise item
+            yield item
+    finally:
+        stop.set()
+        t.join()
+
+
+class BatchControl:
+    """Pause/resume/cancel switches shared between a running batch and whoever started it."""
+    def __init__(self):
+        self._running = threading.Event()
+        self._running.set()
+        self._cancelled = threading.Event()
+
+    def pause(self): self._running.clear()
+    def resume(self): self._running.set()
+
+    def cancel(self):
+        self._cancelled.set()
+        self._running.set()
+
+    @property
+    def paused(self): return not self._running.is_set()
+
+    @property
+    def cancelled(self): return self._cancelled.is_set()
+
+    def wait(self):
+        """Block while paused; returns False once the batch has been cancelled."""
+        self._running.wait()
+        return not self.cancelled
+
+
+class UnredactEngine:
+    def __init__(self, config, log=None):
+        if config.mode not in MODES:
+            raise ValueError(f"Unknown mode: {config.mode}")
+        if config.backend not in BACKENDS:
+            raise ValueError(f"Unknown extraction backend: {config.backend}")
+        if config.clean_pages not in CLEAN_PAGE_MODES:
+            raise ValueError(f"Unknown clean page handling: {config.clean_pages}")
+        if config.text_writer not in TEXT_WRITERS:
+            raise ValueError(f"Unknown text writer: {config.text_writer}")
+        if config.page_cache not in PAGE_CACHE_MODES:
+            raise ValueError(f"Unknown page cache mode: {config.page_cache}")
+        if config.save_mode not in SAVE_MODES:
+            raise ValueError(f"Unknown save mode: {config.save_mode}")
+        if not 0 <= config.garbage <= 4:
+            raise ValueError(f"Garbage collection level must be 0-4, got {config.garbage}")
+        if config.export and config.export not in EXPORT_FORMATS:
+            raise ValueError(f"Unknown export format: {config.export}")
+        if not config.write_pdf and not config.export:
+            raise ValueError("Nothing to write: enable the PDF output or choose an export format")
+        if config.file_timeout < 0 or config.max_memory_mb < 0 or config.max_pages < 0:
+            raise ValueError("File limits must be 0 (off) or positive")
+        self.config = config
+        self._log = log
+        self._font = None  # one fitz.Font shared by every page's TextWriter
+        self._char_widths = {}
+        self.last_metrics_path = None
+
+    @property
+    def limited(self):
+        """True when files run in killable child processes under a time or memory limit."""
+        return self.config.file_timeout > 0 or self.config.max_memory_mb > 0
+
+    def log(self, msg):
+        if self._log: self._log(msg)
+
+    # --- EXTRACTION ---
+    def group_lines(self, words):
+        return group_lines(words, self.config.line_tolerance, self.config.column_gap)
+
+    def page_lines(self, page):
+        """Line records for a ``fitz`` page, read straight from the open document."""
+        return group_columns(fitz_page_columns(page), self.config.line_tolerance, self.config.column_gap)
+
+    def iter_page_lines(self, input_path, start=0, stop=None):
+        """Yield line records ``(text, x0, top, size)`` one page at a time for pages in ``[start, stop)``.
+
+        Each page's parser state is released before the next one is read.
+        """
+        if self.config.backend == "pdfplumber":
+            for words in self._iter_plumber_words(input_path, start, stop):
+                yield self.group_lines(words)
+            return
+        with fitz.open(input_path) as doc:
+            stop = doc.page_count if stop is None else min(stop, doc.page_count)
+            for i in range(start, stop):
+                yield self.page_lines(doc.load_page(i))
+
+    def _iter_plumber_words(self, input_path, start, stop, skip=()):
+        """pdfplumber words for each page in ``[start, stop)``; None for the page numbers in ``skip``."""
+        import pdfplumber  # deferred: it pulls in all of pdfminer, and only this backend needs it
+        with pdfplumber.open(input_path) as pdf:
+            for i, page in enumerate(pdf.pages[start:stop], start):
+                try: yield None if i in skip else page.extract_words(extra_attrs=["size"])
+                finally: page.close()
+
+    def extract_lines(self, input_path, start=0, stop=None):
+        return list(self.iter_page_lines(input_path, start, stop))
+
+    def _word_columns(self, page, words):
+        """All word columns ``(texts, x0, x1, top, size)`` of one page, and the word heights.
+
+        ``words`` are pdfplumber word dicts, or None to read the ``fitz`` page itself.
+        """
+        if words is None:
+            cols = fitz_page_columns(page)
+            return cols, cols[4]
+        cols = ([w["text"] for w in words], [float(w["x0"]) for w in words], [float(w["x1"]) for w in words],
+                [float(w["top"]) for w in words], [float(w.get("size", 10)) for w in words])
+        return cols, [float(w["bottom"]) - float(w["top"]) for w in words]
+
+    def _page_columns(self, page, words, boxes, extracted=None):
+        """Word columns ``(texts, x0, x1, top, size)`` for one page, limited to words under
+        ``boxes`` in redacted-only mode. ``extracted`` is a ``_word_columns`` result to reuse.
+        """
+        cols, heights = extracted or self._word_columns(page, words)
+        if self.config.redacted_only and boxes is not None:
+            mask = overlap_mask(cols[1], cols[2], cols[3], heights, boxes)
+            cols = tuple([v for v, m in zip(col, mask) if m] for col in cols)
+        return cols
+
+    def _page_records(self, page, words, boxes):
+        """Line records for one page, limited to words under ``boxes`` in redacted-only mode."""
+        return group_columns(self._page_columns(page, words, boxes), self.config.line_tolerance, self.config.column_gap)
+
+    # --- WRITING ---
+    def _write_page(self, out, doc, page, p_data, cols=None):
+        """Draw one output page; returns the x offset the recovered text was placed at.
+
+        With ``cols`` (word columns) and ``fit_words`` set, each word is drawn at its own
+        box, sized so its width matches the original, instead of line by line.
+        """
+        mode = self.config.mode
+        i = page.number
+        w, h = page.rect.width, page.rect.height
+        if mode == "side_by_side":
+            np = out.new_page(width=w*2, height=h)
+            np.show_pdf_page(fitz.Rect(0, 0, w, h), doc, i)
+            off = w
+        else:
+            np = out.new_page(width=w, height=h)
+            np.show_pdf_page(fitz.Rect(0, 0, w, h), doc, i)
+            off = 0
+        col = (1, 1, 1) if mode == "overlay_white" else (0, 0, 0)
+        if self.config.text_writer == "per_line":
+            for (t, x, y, s) in p_data:
+                np.insert_text(fitz.Point(x + off, y + s), t, fontsize=s, fontname="helv", color=col)
+            return off
+        font = self._text_font()
+        if cols is not None and self.config.fit_words:
+            items = []
+            for t, x0, x1, y, s in zip(*cols):
+                width = self._text_width(t) * s
+                fs = s * min(max((x1 - x0) / width, FIT_MIN_SCALE), FIT_MAX_SCALE) if width > 0 and x1 > x0 else s
+                items.append((x0, y + s, t, fs))
+        else:
+            items = [(x, y + s, t, s) for t, x, y, s in p_data]
+        # TextWriter re-measures everything appended so far on each append, so commit in batches
+        for k in range(0, len(items), TEXT_BATCH):
+            tw = fitz.TextWriter(np.rect)
+            for x, base, t, fs in items[k:k + TEXT_BATCH]:
+                tw.append(fitz.Point(x + off, base), t, font=font, fontsize=fs)
+            tw.write_text(np, color=col)
+        return off
+
+    def _text_font(self):
+        if self._font is None: self._font = fitz.Font("helv")
+        return self._font
+
+    def _text_width(self, text):
+        """Width of ``text`` at font size 1, from a per-character cache."""
+        widths = self._char_widths
+        for c in text:
+            if c not in widths: widths[c] = self._text_font().text_length(c, fontsize=1)
+        return sum(widths[c] for c in text)
+
+    def _open_page_cache(self):
+        # With PyMuPDF, hashing a page and storing its words costs more than extracting it again.
+        mode = self.config.page_cache
+        if mode == "off" or (mode == "auto" and self.config.backend != "pdfplumber"): return None
+        path = self.config.page_cache_path or cache_path_for(self.config.output_dir)
+        try: return PageCache(path, self.config.page_cache_mb)
+        except sqlite3.Error as e:
+            self.log(f"Page cache unavailable ({e}); extracting every page")
+            return None
+
+    def process_range(self, input_path, out_path, start=0, stop=None, sidecar_path=None):
+        """Stream pages ``[start, stop)`` of ``input_path`` into ``out_path``: extract page N, write it, release it.
+
+        The output is built in ``out_path + ".partial"`` and renamed into place once
+        complete. With ``flush_pages`` set, finished pages are appended to that file
+        every so many pages and the in-memory output is reopened from disk, so memory
+        stays flat however long the document is. ``out_path`` may be None for a
+        text-only run that writes just the ``sidecar_path`` export. When every page is
+        a skipped clean page there is no PDF, and none is left at ``out_path``.
+        """
+        flush_every = self.config.flush_pages
+        clean_pages = self.config.clean_pages
+        detect = self.config.redacted_only or clean_pages != "process"
+        tmp_path = out_path + ".partial" if out_path else None
+        timer = StageTimer()
+        t = time.perf_counter()
+        doc = fitz.open(input_path)
+        out = fitz.open() if out_path else None
+        sidecar = SidecarWriter(sidecar_path, self.config.export) if sidecar_path else None
+        flushed = False
+        words_iter = None
+        stats = {"pages": 0, "words": 0, "stage_seconds": timer.seconds}
+        if out is not None: stats["save_seconds"] = 0.0
+        index_rows = [] if out is not None and self.config.search_index else None
+        if detect: stats["redacted_pages"] = 0
+        cache, keys, memo = self._open_page_cache(), {}, {}
+        try:
+            if self.config.max_pages and doc.page_count > self.config.max_pages:
+                raise LimitExceeded("pages", f"{doc.page_count} pages is over the {self.config.max_pages} page limit")
+            stop = doc.page_count if stop is None else min(stop, doc.page_count)
+            if self.config.backend == "pdfplumber":
+                skip = set()
+                if cache is not None:
+                    # Hash every page up front so the extraction thread can pass over cached ones.
+                    keys = {i: page_key(doc, doc.load_page(i), "pdfplumber", memo) for i in range(start, stop)}
+                    skip = {i for i, k in keys.items() if cache.has(k)}
+                words_iter = prefetch(self._iter_plumber_words(input_path, start, stop, skip), self.config.page_window)
+            t = timer.add("open", t)
+            for n, i in enumerate(range(start, stop), 1):
+                page = doc.load_page(i)
+                words = next(words_iter) if words_iter else None
+                t = timer.add("extract", t)  # pdfplumber: time spent waiting on the extraction thread
+                boxes = find_redaction_boxes(page) if detect else None
+                if detect: t = timer.add("detect", t)
+                if boxes: stats["redacted_pages"] += 1
+                if boxes is not None and not boxes and clean_pages != "process":
+                    if out is not None and clean_pages == "passthrough": out.insert_pdf(doc, from_page=i, to_page=i)
+                    t = timer.add("write", t)
+                else:
+                    extracted = None
+                    if cache is not None:
+                        key = keys.get(i) or page_key(doc, page, self.config.backend, memo)
+                        extracted = cache.get(key)
+                        t = timer.add("cache", t)
+                        # A pdfplumber page skipped up front but evicted since falls back to the fitz words below.
+                        if extracted is None and (words is not None or self.config.backend == "pymupdf"):
+                            extracted = self._word_columns(page, words)
+                            t = timer.add("extract", t)
+                            cache.put(key, *extracted)
+                            t = timer.add("cache", t)
+                    cols = self._page_columns(page, words, boxes, extracted)
+                    t = timer.add("extract", t)
+                    p_data = group_columns(cols, self.config.line_tolerance, self.config.column_gap)
+                    t = timer.add("group", t)
+                    stats["words"] += len(cols[0])
+                    if sidecar:
+                        sidecar.write_page(i, p_data)
+                        t = timer.add("export", t)
+                    if out is not None:
+                        off = self._write_page(out, doc, page, p_data, cols)
+                        if index_rows is not None:
+                            index_rows.extend((out.page_count - 1, x + off, y, s, txt) for txt, x, y, s in p_data)
+                        t = timer.add("write", t)
+                stats["pages"] += 1
+                del page, words
+                if out is not None and flush_every and n % flush_every == 0 and i + 1 < stop and out.page_count:
+                    out = self._flush(out, tmp_path, flushed, stats)
+                    flushed = True
+                    t = timer.add("save", t)
+            if sidecar:
+                sidecar.close()
+                stats["lines"] = sidecar.lines
+                t = timer.add("export", t)
+            if out is not None:
+                if out.page_count: self._finish(out, tmp_path, out_path, flushed, stats)
+                else: _remove_output(out_path)  # stale one from a run with other settings
+                t = timer.add("save", t)
+            if index_rows is not None:
+                with SearchIndex(index_path_for(out_path)) as index:
+                    if os.path.exists(out_path): index.replace_file(out_path, input_path, index_rows)
+                    else: index.remove(out_path)
+                t = timer.add("index", t)
+            if cache is not None:
+                stats["page_cache_hits"], stats["page_cache_misses"] = cache.hits, cache.misses
+            return stats
+        finally:
+            if cache is not None:
+                try: cache.close()
+                except sqlite3.Error as e: self.log(f"Page cache not saved: {e}")
+            if words_iter: words_iter.close()
+            if sidecar: sidecar.abort()
+            if out is not None and not out.is_closed: out.close()
+            doc.close()
+            if tmp_path: _remove_temp(tmp_path)
+
+    # --- SAVING ---
+    def _save_options(self):
+        c = self.config
+        return {"garbage": c.garbage, "deflate": c.deflate, "deflate_images": c.deflate, "deflate_fonts": c.deflate,
+                "use_objstms": int(c.object_streams)}
+
+    def _save_full(self, out, path):
+        opts = self._save_options()
+        if self.config.save_mode == "linear":
+            try:
+                out.save(path, linear=True, **opts)
+                return
+            except Exception:
+                pass  # MuPDF 1.24+ no longer writes linearized files; fall back to a plain full save
+        out.save(path, **opts)
+
+    def _flush(self, out, tmp_path, flushed, stats):
+        """Append ``out`` to ``tmp_path`` (starting it on the first flush) and reopen it from disk."""
+        t0 = time.perf_counter()
+        if flushed: out.saveIncr()
+        else: out.save(tmp_path, **self._save_options())
+        out.close()
+        stats["save_seconds"] += time.perf_counter() - t0
+        return fitz.open(tmp_path)
+
+    def _finish(self, out, tmp_path, out_path, flushed, stats, full=False):
+        """Write the last pages and move the finished output into place.
+
+        A flushed output is rewritten in full, so garbage collection and compression
+        apply to every chunk and merge the resources each one copied separately. In
+        "incremental" mode it is finished with one more append instead, which saves
+        faster but leaves the chunks uncompressed: several times the size on long files.
+        ``full`` forces the rewrite in every mode. Flushed or ``full`` outputs also have
+        their identical fonts and images merged first, as each chunk copied its own.
+        """
+        t0 = time.perf_counter()
+        if flushed and self.config.save_mode == "incremental" and not full:
+            out.saveIncr()
+            src = tmp_path
+        else:
+            src = tmp_path + ".full" if flushed else tmp_path
+            if flushed or full: merge_duplicate_streams(out)  # each chunk or shard part copied its fonts and images
+            self._save_full(out, src)
+        out.close()
+        os.replace(src, out_path)
+        stats["save_seconds"] += time.perf_counter() - t0
+        stats["output_bytes"] = os.path.getsize(out_path)
+
+    def output_paths(self, input_path, output_dir=None):
+        """``(pdf_path, sidecar_path)`` for an input; either is None when that output is off."""
+        output_dir = output_dir or self.config.output_dir
+        pdf = output_path_for(input_path, output_dir) if self.config.write_pdf else None
+        side = sidecar_path_for(input_path, output_dir, self.config.export) if self.config.export else None
+        return pdf, side
+
+    def process_pdf(self, input_path, output_dir=None):
+        """Unredact one file and return a result record describing what happened."""
+        out_path, side_path = self.output_paths(input_path, output_dir)
+        t0 = time.perf_counter()
+        stats = self.process_range(input_path, out_path, sidecar_path=side_path)
+        if out_path and not os.path.exists(out_path): out_path = None  # no pages kept
+        res = {"input": input_path, "output": out_path or side_path, "status": "ok", "error": "",
+               **stats, "seconds": time.perf_counter() - t0}
+        if side_path: res["sidecar"] = side_path
+        return res
+
+    # --- BATCH ---
+    def _safe_process(self, input_path):
+        try:
+            ident = input_identity(input_path)
+            if self.config.profile_dir:
+                res = run_profiled(self.config.profile_dir, os.path.basename(input_path), self.process_pdf, input_path)
+            else:
+                res = self.process_pdf(input_path)
+            return dict(res, **ident)
+        except MemoryError:
+            if self.config.max_memory_mb: raise  # reported by run_limited as a broken memory limit
+            return _error_result(input_path, "out of memory")
+        except Exception as e:
+            return _error_result(input_path, e)
+
+    def _skip_result(self, manifest, input_path, index=None):
+        """A "skipped" result if the manifest says ``input_path`` is already done, else None."""
+        if not self.config.skip_unchanged or not manifest.is_current(input_path, config_fingerprint(self.config)): return None
+        entry = manifest.get(input_path)
+        pdf = entry["output"] if entry["output"] != entry.get("sidecar") else ""
+        if index is not None and pdf and not index.has(pdf): return None  # done before indexing was on
+        return {"input": input_path, "output": entry["output"], "status": "skipped", "error": "", "pages": 0, "seconds": 0.0}
+
+    def _plan_shards(self, input_path):
+        """Split a large document into (start, stop) page ranges, or return None to run it whole."""
+        workers = self.config.workers
+        try:
+            with fitz.open(input_path) as doc:
+                n = doc.page_count
+        except Exception:
+            return None
+        if workers <= 1 or n < self.config.shard_threshold or (self.config.max_pages and n > self.config.max_pages):
+            return None
+        size = self.config.shard_pages or -(-n // workers)
+        return [(s, min(s + size, n)) for s in range(0, n, size)]
+
+    def stitch_shards(self, part_paths, out_path, stats=None):
+        """Concatenate shard outputs in order, appending each one to disk as it is added.
+
+        Each part carries its own copy of the fonts and images its pages use, so the
+        copies are merged and the result is rewritten in full, which drops the spares.
+        Returns the output page number each part starts at.
+        """
+        tmp_path = out_path + ".partial"
+        stats = {"save_seconds": 0.0} if stats is None else stats
+        stats.setdefault("save_seconds", 0.0)
+        out = fitz.open()
+        first_pages, flushed = [], False
+        try:
+            for k, part in enumerate(part_paths):
+                first_pages.append(out.page_count)
+                if not os.path.exists(part): continue  # a range of skipped clean pages only
+                with fitz.open(part) as src:
+                    out.insert_pdf(src)
+                if self.config.flush_pages and k + 1 < len(part_paths):
+                    out = self._flush(out, tmp_path, flushed, stats)
+                    flushed = True
+            if out.page_count: self._finish(out, tmp_path, out_path, flushed, stats, full=True)
+            else: _remove_output(out_path)
+        finally:
+            if not out.is_closed: out.close()
+            _remove_temp(tmp_path)
+        for part in part_paths:
+            if os.path.exists(part): os.remove(part)
+        return first_pages
+
+    def run_batch(self, files, on_result=None, on_start=None, control=None, keep_results=True, manifest=None):
+        """Process every file, calling ``on_result(index, result)`` as each one finishes.
+
+        ``on_start(path)`` fires when a file is picked up. A ``BatchControl`` can pause
+        the batch or cancel it; files already in flight are allowed to finish.
+        ``files`` may be an endless iterable (watch mode) that yields ``IDLE`` while
+        nothing new is ready, so finished work keeps being collected in the meantime.
+        Such runs pass ``keep_results=False``: results then only reach ``on_result`` and
+        the metrics, which are written in segments, and an empty list is returned.
+        ``manifest`` shares the output folder's ``Manifest`` with the caller.
+        """
+        os.makedirs(self.config.output_dir, exist_ok=True)
+        control = control or BatchControl()
+        manifest = manifest or Manifest(self.config.output_dir)
+        fingerprint = config_fingerprint(self.config)
+        index = None
+        if self.config.search_index and self.config.write_pdf:
+            try: index = SearchIndex.for_output_dir(self.config.output_dir)
+            except sqlite3.Error as e:
+                self.log(f"Search index unavailable ({e}); continuing without it")
+                self.config = replace(self.config, search_index=False)
+        results = []  # without keep_results, only those of the current metrics segment
+        finished = 0
+        metrics = BatchMetrics(metrics_path_for(self.config.output_dir), self.config) if self.config.metrics else None
+        t0 = time.perf_counter()
+
+        def write_metrics(complete):
+            try: self.last_metrics_path = metrics.write(summarize(results, time.perf_counter() - t0), complete)
+            except OSError as e: self.log(f"Could not write batch metrics: {e}")
+
+        def finish(res):
+            nonlocal finished, metrics, t0
+            self._relay(res["input"], res.pop("log", ()))
+            if res["status"] != "skipped":
+                manifest.record_result(res, fingerprint, self.config.mode, ENGINE_VERSION)
+            if keep_results or metrics is not None: results.append(res)
+            if on_result: on_result(finished, res)
+            finished += 1
+            if metrics is None: return
+            metrics.add(res)
+            if not metrics.due(streaming=not keep_results): return
+            if keep_results or not metrics.full:
+                write_metrics(complete=False)  # checkpoint, so a killed run still leaves its metrics
+                return
+            write_metrics(complete=True)
+            metrics, t0 = metrics.next_segment(), time.perf_counter()
+            results.clear()
+
+        try:
+            self._dispatch(files, finish, manifest, index, control, on_start)
+        finally:
+            if index is not None: index.close()
+            if metrics is not None and (keep_results or metrics.files): write_metrics(complete=True)
+        return results if keep_results else []
+
+    def _dispatch(self, files, finish, manifest, index, control, on_start):
+        """Run ``files`` serially or on the process pool, passing every result to ``finish``."""
+        if self.config.workers <= 1:
+            for f in files:
+                if not control.wait(): break
+                if f is IDLE: continue
+                skipped = self._skip_result(manifest, f, index)
+                if skipped:
+                    finish(skipped)
+                    continue
+                self.log(f"Processing: {os.path.basename(f)}")
+                if on_start: on_start(f)
+                finish(_process_limited(self.config, f) if self.limited else self._safe_process(f))
+            return
+
+        pending = iter(files)
+        max_in_flight = self.config.workers + 1
+        # With limits, pool threads only wait on the killable child process each job runs in.
+        executor = ThreadPoolExecutor if self.limited else ProcessPoolExecutor
+        with executor(max_workers=self.config.workers) as pool:
+            futures, sharded = {}, {}
+
+            def submit_next():
+                f = next(pending, None)
+                while f is not None and f is not IDLE:
+                    skipped = self._skip_result(manifest, f, index)
+                    if not skipped: break
+                    finish(skipped)
+                    f = next(pending, None)
+                if f is None: return False
+                if f is IDLE: return IDLE
+                if on_start: on_start(f)
+                shards = self._plan_shards(f)
+                if not shards:
+                    futures[pool.submit(_process_limited if self.limited else _process_in_worker, self.config, f)] = (f, None)
+                    return True
+                self.log(f"Sharding {os.path.basename(f)} into {len(shards)} page ranges")
+                out_path, side_path = self.output_paths(f)
+                parts = [f"{out_path}.part{k:04d}" if out_path else None for k in range(len(shards))]
+                side_parts = [f"{side_path}.part{k:04d}" if side_path else None for k in range(len(shards))]
+                sharded[f] = {"parts": parts, "side_parts": side_parts, "pending": len(shards), "stats": {}, "busy": 0.0,
+                              "error": "", "t0": time.perf_counter()}
+                try: sharded[f]["ident"] = input_identity(f)
+                except OSError as e: sharded[f]["error"] = str(e)
+                for k, (start, stop) in enumerate(shards):
+                    args = (self.config, f, start, stop, parts[k], side_parts[k])
+                    if self.limited:
+                        futures[pool.submit(run_limited, _process_shard_in_worker, args, self.config.file_timeout,
+                                            self.config.max_memory_mb)] = (f, k)
+                    else:
+                        futures[pool.submit(_process_shard_in_worker, *args)] = (f, k)
+                return True
+
+            exhausted = False
+            while True:
+                while not exhausted and len(futures) < max_in_flight and not control.paused and not control.cancelled:
+                    submitted = submit_next()
+                    if submitted is IDLE: break
+                    exhausted = not submitted
+                if not futures:
+                    if exhausted or not control.wait(): break
+                    continue
+                done, _ = wait(futures, timeout=0.25, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    f, shard = futures.pop(fut)
+                    if shard is None:
+                        res = fut.result()
+                    else:
+                        state = sharded[f]
+                        try:
+                            stats, secs = fut.result()
+                            self._relay(f, stats.pop("log", ()))
+                            merge_stats(state["stats"], stats)
+                            state["busy"] += secs
+                        except Exception as e:
+                            state["error"] = state["error"] or str(e)
+                        state["pending"] -= 1
+                        if state["pending"]: continue
+                        res = self._finish_sharded(f, sharded.pop(f), index)
+                    finish(res)
+
+    def _relay(self, input_path, messages):
+        """Log the messages a worker or child process collected while running ``input_path``."""
+        for msg in messages: self.log(f"{os.path.basename(input_path)}: {msg}")
+
+    def _finish_sharded(self, input_path, state, index=None):
+        out_path, side_path = self.output_paths(input_path)
+        try:
+            if state["error"]: raise RuntimeError(state["error"])
+            if out_path:
+                t = time.perf_counter()
+                first_pages = self.stitch_shards(state["parts"], out_path, state["stats"])
+                merge_stats(state["stats"], {"stage_seconds": {"save": time.perf_counter() - t}})
+                if index is not None and os.path.exists(out_path):
+                    index.merge_parts(out_path, input_path, list(zip(state["parts"], first_pages)))
+                elif index is not None: index.remove(out_path)
+                if not os.path.exists(out_path): out_path = None  # no pages kept
+            if side_path: concat_sidecars(state["side_parts"], side_path, self.config.export)
+        except Exception as e:
+            for part in state["parts"] + state["side_parts"]:
+                if part: _remove_temp(part + ".partial")  # left behind by a shard killed for a limit
+                if part and os.path.exists(part): os.remove(part)
+                if part and index is not None: index.remove(part)
+            return _error_result(input_path, e)
+        res = {"input": input_path, "output": out_path or side_path, "status": "ok", "error": "",
+               **state["stats"], **state["ident"], "seconds": time.perf_counter() - state["t0"], "busy_seconds": state["busy"]}
+        if side_path: res["sidecar"] = side_path
+        return res
+
+
+def _remove_output(path):
+    if os.path.exists(path): os.remove(path)
+
+
+def _remove_temp(tmp_path):
+    for p in (tmp_path, tmp_path + ".full"):
+        if os.path.exists(p): os.remove(p)
+
+
+def merge_duplicate_streams(doc):
+    """Point every reference to a byte-identical copy of a stream (a font file, an image) at
+    one copy and return how many copies were dropped; a save with garbage collection then
+    leaves them out. This is garbage level 4's stream merging in linear time: MuPDF compares
+    objects pairwise, which takes minutes on outputs with thousands of pages.
+    """
+    digests = {}
+    for x in range(1, doc.xref_length()):
+        try:
+            if doc.xref_is_stream(x): digests[x] = hashlib.sha1(doc.xref_stream_raw(x) or b"").digest()
+        except Exception:
+            continue
+    remap = {}
+
+    def canon(m):
+        x = int(m.group(1))
+        while x in remap: x = remap[x]
+        return f"{x} {m.group(2)} R"
+
+    while True:
+        # Repeat until stable: an image matches its copies only once their soft masks are merged.
+        first, found = {}, {}
+        for x, digest in digests.items():
+            if x in remap: continue
+            key = (digest, REF.sub(canon, doc.xref_object(x, compressed=True)))
+            if key in first: found[x] = first[key]
+            else: first[key] = x
+        if not found: break
+        remap.update(found)
+    if not remap: return 0
+    for x in range(1, doc.xref_length()):
+        if x in remap: continue
+        try: src = doc.xref_object(x, compressed=True)
+        except Exception: continue
+        if not any(int(m.group(1)) in remap for m in REF.finditer(src)): continue
+        if x not in digests:
+            doc.update_object(x, REF.sub(canon, src))
+            continue
+        for key in doc.xref_get_keys(x):  # stream objects: rewrite the dictionary, keep the data
+            value = doc.xref_get_key(x, key)[1]
+            new = REF.sub(canon, value)
+            if new != value: doc.xref_set_key(x, key, new)
+    return len(remap)
+
+
+def config_fingerprint(config):
+    """Hash of the settings that change what an output file contains."""
+    key = [ENGINE_VERSION, config.mode, config.backend, config.line_tolerance, config.column_gap,
+           config.redacted_only, config.clean_pages]
+    if config.export or not config.write_pdf: key += [config.export, config.write_pdf]
+    if config.fit_words: key += ["fit_words"]
+    if config.text_writer != "batched": key += [config.text_writer]
+    return hashlib.sha1(json.dumps(key).encode()).hexdigest()[:16]
+
+
+def _error_result(input_path, exc):
+    return {"input": input_path, "output": "", "status": "error", "error": str(exc), "pages": 0, "seconds": 0.0}
+
+
+def _process_in_worker(config, input_path):
+    messages = []  # the parent logs these; a worker has no log callback of its own
+    res = UnredactEngine(config, log=messages.append)._safe_process(input_path)
+    if messages: res["log"] = messages
+    return res
+
+
+def _process_limited(config, input_path):
+    """Whole-file job in a child process under the configured limits. A file that breaks a
+    time or memory limit is retried once on ``fallback_config``'s cheaper path."""
+    try:
+        return run_limited(_process_in_worker, (config, input_path), config.file_timeout, config.max_memory_mb)
+    except LimitExceeded as e:
+        first = e
+        _discard_partials(config, input_path)
+    except RuntimeError as e:
+        return _error_result(input_path, e)
+    cheaper = fallback_config(config, first.kind) if config.fallback else None
+    if cheaper is None: return _error_result(input_path, first)
+    try:
+        res = run_limited(_process_in_worker, (cheaper, input_path), config.file_timeout, config.max_memory_mb)
+    except (LimitExceeded, RuntimeError) as e:
+        _discard_partials(cheaper, input_path)
+        return _error_result(input_path, f"{first}; retry on {cheaper.backend} also failed: {e}")
+    if res["status"] == "ok": res["fallback"] = f"{first}; retried on {cheaper.backend}"
+    return res
+
+
+def _discard_partials(config, input_path):
+    """Remove the temp files of a job killed before it could clean up after itself."""
+    for path in UnredactEngine(config).output_paths(input_path):
+        if path: _remove_temp(path + ".partial")
+
+
+def _process_shard_in_worker(config, input_path, start, stop, part_path, sidecar_part=None):
+    t0 = time.perf_counter()
+    messages = []
+    engine = UnredactEngine(config, log=messages.append)
+    if config.profile_dir:
+        stats = run_profiled(config.profile_dir, f"{os.path.basename(input_path)}.p{start}", engine.process_range,
+                             input_path, part_path, start, stop, sidecar_part)
+    else:
+        stats = engine.process_range(input_path, part_path, start, stop, sidecar_part)
+    if messages: stats = dict(stats, log=messages)
+    return stats, time.perf_counter() - t0
+
+
+def summarize(results, wall_seconds):
+    """Batch totals, including how far the work scaled beyond one core."""
+    ok = [r for r in results if r["status"] == "ok"]
+    pages = sum(r["pages"] for r in ok)
+    busy = sum(r.get("busy_seconds", r["seconds"]) for r in ok)
+    summary = {"files": len(results), "ok": len(ok), "failed": sum(1 for r in results if r["status"] == "error"),
+               "skipped": sum(1 for r in results if r["status"] == "skipped"), "pages": pages,
+               "seconds": wall_seconds, "pages_per_sec": pages / wall_seconds if wall_seconds > 0 else 0.0,
+               "speedup": busy / wall_seconds if wall_seconds > 0 else 0.0}
+    if any("output_bytes" in r for r in ok):
+        summary["output_bytes"] = sum(r.get("output_bytes", 0) for r in ok)
+        summary["input_bytes"] = sum(r.get("size") or 0 for r in ok if "output_bytes" in r)
+        summary["save_seconds"] = sum(r.get("save_seconds", 0.0) for r in ok)
+    if any("redacted_pages" in r for r in ok):
+        summary["redacted_pages"] = sum(r.get("redacted_pages", 0) for r in ok)
+    if any("page_cache_hits" in r for r in ok):
+        summary["page_cache_hits"] = sum(r.get("page_cache_hits", 0) for r in ok)
+        summary["page_cache_misses"] = sum(r.get("page_cache_misses", 0) for r in ok)
+    return summary
+
+
+def format_output_size(res):
+    """Output size against the input and the time spent saving, for a per-file log line."""
+    if "output_bytes" not in res: return ""
+    text = f"{res['output_bytes'] / 1e6:.2f} MB"
+    if res.get("size"): text += f" ({res['output_bytes'] / res['size']:.2f}x input)"
+    return text + f", saved in {res.get('save_seconds', 0.0):.2f}s"
+
+
+def format_summary(summary):
+    text = (f"{summary['ok']} ok, {summary['skipped']} unchanged, {summary['failed']} failed, {summary['pages']} pages in {summary['seconds']:.1f}s "
+            f"({summary['pages_per_sec']:.1f} pages/sec, {summary['speedup']:.1f}x over serial)")
+    if "redacted_pages" in summary: text += f", {summary['redacted_pages']} pages with redactions"
+    if "output_bytes" in summary:
+        text += f", {summary['output_bytes'] / 1e6:.1f} MB written"
+        if summary["input_bytes"]: text += f" ({summary['output_bytes'] / summary['input_bytes']:.2f}x input)"
+        text += f", {summary['save_seconds']:.1f}s saving"
+    lookups = summary.get("page_cache_hits", 0) + summary.get("page_cache_misses", 0)
+    if lookups: text += f", page cache {summary['page_cache_hits']}/{lookups} hits ({summary['page_cache_hits'] / lookups:.0%})"
+    return text
+
+
+# --- CLI ---
+def build_arg_parser():
+    ap = argparse.ArgumentParser(prog="unredact_engine", description="Recover text hidden under cosmetic PDF redactions.")
+    ap.add_argument("inputs", nargs="+", help="PDF files, folders or glob patterns")
+    ap.add_argument("-o", "--output-dir", required=True, help="folder for UNREDACTED_*.pdf outputs")
+    ap.add_argument("-m", "--mode", choices=MODES, default="side_by_side")
+    ap.add_argument("-b", "--backend", choices=BACKENDS, default="pymupdf", help="text extraction backend (default: pymupdf)")
+    ap.add_argument("-j", "--workers", type=int, default=1, help="worker processes (default: 1)")
+    ap.add_argument("--shard-threshold", type=int, default=5000, help="split files with at least this many pages across workers")
+    ap.add_argument("--shard-pages", type=int, default=0, help="pages per shard (default: split evenly over workers)")
+    ap.add_argument("--line-tolerance", type=float, default=3.0, help="max top difference (pt) for words on one line")
+    ap.add_argument("--column-gap", type=float, default=0.0, help="split lines at gaps wider than this many points (multi-column layouts)")
+    ap.add_argument("--redacted-only", action="store_true", help="only recover text lying under detected redaction boxes")
+    ap.add_argument("--clean-pages", choices=CLEAN_PAGE_MODES, default="process",
+                    help="pages with no detected redactions: process them, pass them through unchanged, or skip them")
+    ap.add_argument("--force", action="store_true", help="reprocess inputs even if the manifest says their output is current")
+    ap.add_argument("--no-index", action="store_true", help="do not record recovered text in the output folder's search index")
+    ap.add_argument("--text-writer", choices=TEXT_WRITERS, default="batched",
+                    help="batched: one TextWriter per page (default); per_line: the original insert_text call per line")
+    ap.add_argument("--fit-words", action="store_true", help="draw each recovered word at its original box and width")
+    ap.add_argument("--garbage", type=int, choices=range(5), default=1,
+                    help="PDF garbage collection level; 3 or 4 also merge duplicate fonts/images/XObjects (default: 1)")
+    ap.add_argument("--no-deflate", action="store_true", help="do not compress uncompressed streams in the output")
+    ap.add_argument("--no-object-streams", action="store_true", help="do not pack objects into compressed object streams")
+    ap.add_argument("--save-mode", choices=SAVE_MODES, default="full",
+                    help="full: rewrite flushed outputs compressed at the end (default); incremental: append to them, "
+                         "faster but several times larger on long files; linear: full and linearized")
+    ap.add_argument("--timeout", type=float, default=0, help="kill a file (or shard) still running after this many seconds (default: off)")
+    ap.add_argument("--max-memory", type=int, default=0, help="memory in MB the process running each file may allocate (default: off)")
+    ap.add_argument("--max-pages", type=int, default=0, help="fail files with more pages than this without processing them")
+    ap.add_argument("--no-fallback", action="store_true", help="do not retry files that hit a limit on the cheaper PyMuPDF path")
+    ap.add_argument("--page-cache-mode", choices=PAGE_CACHE_MODES, default="auto",
+                    help="reuse text of identical pages from earlier files and batches; auto: with pdfplumber only (default)")
+    ap.add_argument("--no-page-cache", action="store_true", help="same as --page-cache-mode off")
+    ap.add_argument("--page-cache", default="", help="page cache database to use (default: in the output folder); share one across output folders")
+    ap.add_argument("--page-cache-mb", type=int, default=512, help="size budget of the page cache (default: 512)")
+    ap.add_argument("--no-metrics", action="store_true", help="do not write the batch metrics JSON file")
+    ap.add_argument("--profile-dir", default="", help="profile each file with cProfile and write .prof files here")
+    ap.add_argument("--export", choices=EXPORT_FORMATS, help="also write recovered lines as a JSONL or columnar JSON sidecar")
+    ap.add_argument("--no-pdf", action="store_true", help="text-only run: write the --export sidecar without the PDF output")
+    ap.add_argument("--page-window", type=int, default=4, help="pages extracted ahead of the writer (pdfplumber backend)")
+    ap.add_argument("--flush-pages", type=int, default=200, help="append output pages to disk every N pages; 0 disables")
+    ap.add_argument("--no-subdirs", action="store_true", help="do not descend into subfolders of input folders")
+    return ap
+
+
+def main(argv=None):
+    args = build_arg_parser().parse_args(argv)
+    if args.no_pdf and not args.export:
+        print("--no-pdf needs an --export format.", file=sys.stderr)
+        return 2
+    files = expand_inputs(args.inputs, recursive=not args.no_subdirs)
+    if not files:
+        print("No PDF files found.", file=sys.stderr)
+        return 2
+
+    engine = UnredactEngine(config_from_args(args), log=log)
+    t0 = time.perf_counter()
+
+    def on_result(i, res):
+        log(f"[{i + 1}/{len(files)}] {describe_result(res)}")
+
+    results = engine.run_batch(files, on_result=on_result)
+    summary = summarize(results, time.perf_counter() - t0)
+    log(f"BATCH COMPLETE. {format_summary(summary)}")
+    for line in slowest_report(results): log(line)
+    if engine.last_metrics_path: log(f"Metrics: {engine.last_metrics_path}")
+    return 1 if summary["failed"] else 0
+
+
+def log(msg):
+    print(f"[{datetime.now().strftime('%H:%M:%S')}] {msg}", flush=True)
+
+
+def describe_result(res):
+    """One log line for a finished file."""
+    name = os.path.basename(res["input"])
+    if res["status"] == "skipped": return f"{name}: unchanged, skipped"
+    if res["status"] != "ok": return f"{name}: Error: {res['error']}"
+    return (f"{name}: {res['pages']} pages in {res['seconds']:.2f}s ({res['pages'] / max(res['seconds'], 1e-9):.1f} pages/sec)"
+            + (f", {format_output_size(res)}" if "output_bytes" in res else "")
+            + (f" [{res['fallback']}]" if "fallback" in res else ""))
+
+
+def config_from_args(args):
+    return EngineConfig(output_dir=args.output_dir, mode=args.mode, backend=args.backend, workers=max(1, args.workers),
+                          shard_threshold=args.shard_threshold, shard_pages=args.shard_pages,
+                          page_window=args.page_window, flush_pages=args.flush_pages,
+                          line_tolerance=args.line_tolerance, column_gap=args.column_gap,
+                          redacted_only=args.redacted_only, clean_pages=args.clean_pages, skip_unchanged=not args.force,
+                          search_index=not args.no_index, export=args.export or "", write_pdf=not args.no_pdf,
+                          garbage=args.garbage, deflate=not args.no_deflate, object_streams=not args.no_object_streams,
+                          save_mode=args.save_mode, text_writer=args.text_writer, fit_words=args.fit_words,
+                          file_timeout=args.timeout, max_memory_mb=args.max_memory, max_pages=args.max_pages,
+                          fallback=not args.no_fallback, page_cache="off" if args.no_page_cache else args.page_cache_mode, page_cache_path=args.page_cache, page_cache_mb=args.page_cache_mb,
+                          metrics=not args.no_metrics, profile_dir=args.profile_dir)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
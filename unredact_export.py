@@ -0,0 +1,91 @@
+"""Sidecar export of recovered text.
+
+Writes the line records the engine builds for each page, ``(text, x0, top, size)``
+plus the source page number, next to (or instead of) the PDF output, so
+downstream tools never have to parse the PDFs again:
+
+* ``jsonl``: one JSON object per line, streamed to disk as pages are processed.
+* ``columns``: one JSON document of parallel ``page``/``text``/``x0``/``top``/``size``
+  arrays, compact and quick to load into a dataframe.
+
+Page numbers are 0-based pages of the input document.
+"""
+import os
+import json
+
+EXPORT_FORMATS = ("jsonl", "columns")
+SUFFIXES = {"jsonl": ".jsonl", "columns": ".columns.json"}
+COLUMNS = ("page", "text", "x0", "top", "size")
+
+
+def sidecar_path_for(input_path, output_dir, fmt):
+    stem = os.path.splitext(os.path.basename(input_path))[0]
+    return os.path.join(output_dir, f"UNREDACTED_{stem}{SUFFIXES[fmt]}")
+
+
+class SidecarWriter:
+    """Builds a sidecar in ``path + ".partial"`` and renames it into place on ``close()``."""
+    def __init__(self, path, fmt):
+        if fmt not in EXPORT_FORMATS:
+            raise ValueError(f"Unknown export format: {fmt}")
+        self.path, self.fmt = path, fmt
+        self.tmp_path = path + ".partial"
+        self.fh = open(self.tmp_path, "w", encoding="utf-8")
+        self.columns = {k: [] for k in COLUMNS} if fmt == "columns" else None
+        self.lines = 0
+
+    def write_page(self, page_no, records):
+        if self.columns is not None:
+            cols = self.columns
+            for t, x, y, s in records:
+                cols["page"].append(page_no)
+                cols["text"].append(t)
+                cols["x0"].append(round(x, 2))
+                cols["top"].append(round(y, 2))
+                cols["size"].append(round(s, 2))
+        else:
+            self.fh.writelines(json.dumps({"page": page_no, "text": t, "x0": round(x, 2), "top": round(y, 2),
+                                           "size": round(s, 2)}, ensure_ascii=False) + "\n" for t, x, y, s in records)
+        self.lines += len(records)
+
+    def close(self):
+        if self.columns is not None:
+            json.dump(self.columns, self.fh, ensure_ascii=False, separators=(",", ":"))
+        self.fh.close()
+        os.replace(self.tmp_path, self.path)
+
+    def abort(self):
+        if not self.fh.closed: self.fh.close()
+        if os.path.exists(self.tmp_path): os.remove(self.tmp_path)
+
+
+def concat_sidecars(part_paths, out_path, fmt):
+    """Join shard sidecars in page order into ``out_path`` and remove the parts."""
+    tmp_path = out_path + ".partial"
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as out:
+            if fmt == "jsonl":
+                for part in part_paths:
+                    with open(part, encoding="utf-8") as src:
+                        for line in src: out.write(line)
+            else:
+                merged = {k: [] for k in COLUMNS}
+                for part in part_paths:
+                    with open(part, encoding="utf-8") as src:
+                        cols = json.load(src)
+                    for k in COLUMNS: merged[k].extend(cols[k])
+                json.dump(merged, out, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp_path, out_path)
+    finally:
+        if os.path.exists(tmp_path): os.remove(tmp_path)
+    for part in part_paths:
+        os.remove(part)
+
+
+def read_sidecar(path):
+    """Load a sidecar of either format as a list of ``(page, text, x0, top, size)`` tuples."""
+    with open(path, encoding="utf-8") as fh:
+        if path.endswith(SUFFIXES["columns"]):
+            cols = json.load(fh)
+            return list(zip(*(cols[k] for k in COLUMNS)))
+        return [tuple(json.loads(line)[k] for k in COLUMNS) for line in fh if line.strip()]
@@ -0,0 +1,137 @@
+"""Full-text search over recovered text.
+
+Every output folder keeps a SQLite database of the lines the engine drew into
+its outputs, with their output page and position, behind an FTS5 index. The
+engine updates it file by file as batches run, so finding a name across
+thousands of outputs is one query instead of opening each PDF.
+
+    python -m unredact_index ./unredacted "john smith"
+"""
+import os
+import sys
+import sqlite3
+import argparse
+from datetime import datetime
+
+INDEX_NAME = ".unredact_index.sqlite"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (id INTEGER PRIMARY KEY, output TEXT UNIQUE, input TEXT, indexed_at TEXT);
+CREATE TABLE IF NOT EXISTS lines (id INTEGER PRIMARY KEY, file_id INTEGER, page INTEGER,
+                                  x REAL, top REAL, size REAL, text TEXT);
+CREATE INDEX IF NOT EXISTS lines_file ON lines(file_id);
+CREATE VIRTUAL TABLE IF NOT EXISTS lines_fts USING fts5(text, content='lines', content_rowid='id');
+CREATE TRIGGER IF NOT EXISTS lines_ai AFTER INSERT ON lines BEGIN
+    INSERT INTO lines_fts(rowid, text) VALUES (new.id, new.text);
+END;
+CREATE TRIGGER IF NOT EXISTS lines_ad AFTER DELETE ON lines BEGIN
+    INSERT INTO lines_fts(lines_fts, rowid, text) VALUES ('delete', old.id, old.text);
+END;
+"""
+
+
+def index_path_for(output_path):
+    return os.path.join(os.path.dirname(os.path.abspath(output_path)), INDEX_NAME)
+
+
+def fts_query(text):
+    """Turn free text into an FTS5 query: every word must appear, the last one as a prefix."""
+    words = ['"' + w.replace('"', '""') + '"' for w in text.split()]
+    if not words: return ""
+    return " ".join(words) + "*"
+
+
+class SearchIndex:
+    """One output folder's index. Safe to open from several worker processes at once."""
+    def __init__(self, path):
+        self.path = path
+        self.db = sqlite3.connect(path, timeout=60)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(SCHEMA)
+
+    @classmethod
+    def for_output_dir(cls, output_dir):
+        return cls(os.path.join(output_dir, INDEX_NAME))
+
+    def close(self):
+        self.db.close()
+
+    def __enter__(self): return self
+    def __exit__(self, *exc): self.close()
+
+    def _file_id(self, output):
+        row = self.db.execute("SELECT id FROM files WHERE output = ?", (output,)).fetchone()
+        return row[0] if row else None
+
+    def has(self, output):
+        return self._file_id(os.path.abspath(output)) is not None
+
+    def _drop(self, file_id):
+        self.db.execute("DELETE FROM lines WHERE file_id = ?", (file_id,))
+        self.db.execute("DELETE FROM files WHERE id = ?", (file_id,))
+
+    def replace_file(self, output, input_path, rows):
+        """Swap in the lines of a freshly written output: ``rows`` are ``(page, x, top, size, text)``."""
+        output = os.path.abspath(output)
+        with self.db:
+            old = self._file_id(output)
+            if old is not None: self._drop(old)
+            cur = self.db.execute("INSERT INTO files (output, input, indexed_at) VALUES (?, ?, ?)",
+                                  (output, os.path.abspath(input_path), datetime.now().isoformat(timespec="seconds")))
+            fid = cur.lastrowid
+            self.db.executemany("INSERT INTO lines (file_id, page, x, top, size, text) VALUES (?, ?, ?, ?, ?, ?)",
+                                ((fid,) + tuple(r) for r in rows))
+
+    def merge_parts(self, output, input_path, parts):
+        """Re-home the lines of shard outputs onto the stitched file. ``parts`` are
+        ``(part_path, first_page)`` in page order."""
+        output = os.path.abspath(output)
+        with self.db:
+            old = self._file_id(output)
+            if old is not None: self._drop(old)
+            cur = self.db.execute("INSERT INTO files (output, input, indexed_at) VALUES (?, ?, ?)",
+                                  (output, os.path.abspath(input_path), datetime.now().isoformat(timespec="seconds")))
+            fid = cur.lastrowid
+            for part, first_page in parts:
+                pid = self._file_id(os.path.abspath(part))
+                if pid is None: continue
+                self.db.execute("UPDATE lines SET file_id = ?, page = page + ? WHERE file_id = ?", (fid, first_page, pid))
+                self.db.execute("DELETE FROM files WHERE id = ?", (pid,))
+
+    def remove(self, output):
+        with self.db:
+            fid = self._file_id(os.path.abspath(output))
+            if fid is not None: self._drop(fid)
+
+    def search(self, text, limit=200):
+        """Hits as dicts with output, page, x, top, size and text, best matches first."""
+        q = fts_query(text)
+        if not q: return []
+        rows = self.db.execute(
+            "SELECT f.output, l.page, l.x, l.top, l.size, l.text FROM lines_fts "
+            "JOIN lines l ON l.id = lines_fts.rowid JOIN files f ON f.id = l.file_id "
+            "WHERE lines_fts MATCH ? ORDER BY rank LIMIT ?", (q, limit)).fetchall()
+        return [{"output": r[0], "page": r[1], "x": r[2], "top": r[3], "size": r[4], "text": r[5]} for r in rows]
+
+
+# --- CLI ---
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog="unredact_index", description="Search the text recovered into an output folder.")
+    ap.add_argument("output_dir", help="folder holding UNREDACTED_*.pdf outputs and their index")
+    ap.add_argument("query", help="words to look for; the last word matches as a prefix")
+    ap.add_argument("-n", "--limit", type=int, default=50)
+    args = ap.parse_args(argv)
+    path = os.path.join(args.output_dir, INDEX_NAME)
+    if not os.path.exists(path):
+        print(f"No search index in {args.output_dir}", file=sys.stderr)
+        return 2
+    with SearchIndex(path) as index:
+        hits = index.search(args.query, args.limit)
+    for h in hits:
+        print(f"{os.path.basename(h['output'])}  p.{h['page'] + 1}  {h['text']}")
+    return 0 if hits else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
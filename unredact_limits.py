@@ -0,0 +1,107 @@
+"""Per-file resource limits.
+
+With a time or memory limit configured, every file (or shard) runs in a child
+process of its own. Children come from a fork server (spawned where there is
+none), not from the caller, so they do not inherit a large parent's memory or
+the locks of its threads. The child caps its address space at what it started
+with plus the memory limit; the parent waits up to the timeout and kills it
+when it overruns. A pathological PDF then costs at most
+the timeout, is reported as failed with the reason, and never stalls the batch
+or takes the process that started it down with it.
+"""
+import multiprocessing
+from dataclasses import replace
+
+try: import resource  # POSIX only; memory ceilings are not enforced elsewhere
+except ImportError: resource = None
+
+FALLBACK_FLUSH_PAGES = 25  # flush interval of the low-memory retry
+PRELOAD = ["unredact_engine"]  # imported once by the fork server instead of by every child
+_context = None
+
+
+class LimitExceeded(Exception):
+    """A file was stopped for breaking a limit. ``kind`` is "timeout", "memory", "crash" or "pages"."""
+    def __init__(self, kind, message):
+        super().__init__(message)
+        self.kind = kind
+
+
+def _address_space():
+    """Bytes of address space this process already has mapped, or 0 where that cannot be read."""
+    try:
+        with open("/proc/self/statm") as fh: return int(fh.read().split()[0]) * resource.getpagesize()
+    except (OSError, ValueError, IndexError): return 0
+
+
+def _child(conn, memory_mb, fn, args):
+    if memory_mb and resource is not None:
+        limit = _address_space() + memory_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    try:
+        conn.send(("ok", fn(*args)))
+    except MemoryError:
+        conn.send(("memory", f"memory limit of {memory_mb} MB exceeded"))
+    except Exception as e:
+        conn.send(("error", str(e) or type(e).__name__))
+    finally:
+        conn.close()
+
+
+def process_context():
+    """The multiprocessing context limited jobs run in: a fork server where the platform has one."""
+    global _context
+    if _context is None:
+        if "forkserver" in multiprocessing.get_all_start_methods():
+            _context = multiprocessing.get_context("forkserver")
+            _context.set_forkserver_preload(PRELOAD)
+        else:
+            _context = multiprocessing.get_context("spawn")
+    return _context
+
+
+def run_limited(fn, args, timeout=0, memory_mb=0):
+    """Return ``fn(*args)`` computed in a child process.
+
+    ``memory_mb`` is how much the child may allocate on top of its starting size.
+    Raises ``LimitExceeded`` when the child runs past ``timeout`` seconds, runs out of
+    memory or dies, and ``RuntimeError`` with the message of any other exception.
+    """
+    ctx = process_context()
+    recv, send = ctx.Pipe(duplex=False)
+    proc = ctx.Process(target=_child, args=(send, memory_mb, fn, args), daemon=True)
+    proc.start()
+    send.close()
+    try:
+        if not recv.poll(timeout if timeout > 0 else None):
+            raise LimitExceeded("timeout", f"timed out after {timeout:g}s")
+        try: kind, payload = recv.recv()
+        except EOFError:
+            proc.join(5)
+            code = proc.exitcode
+            hint = " (likely out of memory)" if code == -9 else ""
+            raise LimitExceeded("crash", f"worker died with exit code {code}{hint}") from None
+    finally:
+        if proc.is_alive():
+            proc.kill()
+        proc.join()
+        recv.close()
+    if kind == "ok": return payload
+    if kind == "memory": raise LimitExceeded("memory", payload)
+    raise RuntimeError(payload)
+
+
+def fallback_config(config, kind):
+    """A cheaper configuration to retry a file that broke a limit with, or None when there is none.
+
+    Timeouts retry on the much faster PyMuPDF extractor; memory failures and crashes also
+    flush the output to disk more often.
+    """
+    if kind in ("memory", "crash"):
+        flush = min(config.flush_pages or FALLBACK_FLUSH_PAGES, FALLBACK_FLUSH_PAGES)
+        cheaper = replace(config, backend="pymupdf", flush_pages=flush, page_window=1)
+    elif kind == "timeout":
+        cheaper = replace(config, backend="pymupdf", page_window=1)
+    else:
+        return None
+    return None if cheaper == config else cheaper
@@ -0,0 +1,168 @@
+"""Word extraction helpers and line assembly.
+
+``group_lines``/``group_columns`` turn word boxes into the ``(text, x0, top, size)`` line records the
+writer draws. When NumPy is installed it clusters baselines and orders words
+within lines on arrays; otherwise it falls back to the original pure-Python loop.
+"""
+NUMPY_MIN_WORDS = 2000  # below this the array setup costs more than it saves
+_numpy = False  # not looked for yet; None once known to be missing
+
+
+def numpy_module():
+    """NumPy, imported on first use so it stays out of startup, or None when it is not installed."""
+    global _numpy
+    if _numpy is False:
+        try: import numpy as _numpy
+        except ImportError: _numpy = None  # optional speed-up
+    return _numpy
+
+
+def fitz_page_columns(page, x_tolerance=3.0):
+    """Word columns ``(texts, x0, x1, top, size)`` read from a ``fitz`` page.
+
+    Characters are split into words on whitespace and on gaps wider than
+    ``x_tolerance``, as pdfplumber does. ``top`` is placed where pdfminer would put
+    it (baseline minus font size plus descent) so line records match the
+    pdfplumber backend.
+    """
+    texts, x0s, x1s, tops, sizes = [], [], [], [], []
+    for block in page.get_text("rawdict")["blocks"]:
+        for line in block.get("lines", ()):
+            chars, last_x1 = None, 0.0
+            for span in line["spans"]:
+                size, desc = span["size"], span["descender"]
+                for ch in span["chars"]:
+                    c = ch["c"]
+                    if c.isspace():
+                        chars = None
+                        continue
+                    x0, _, x1, _ = ch["bbox"]
+                    if chars is None or x0 - last_x1 > x_tolerance:
+                        chars = [c]
+                        texts.append(chars)
+                        x0s.append(x0)
+                        x1s.append(x1)
+                        tops.append(ch["origin"][1] - size * (1 + desc))
+                        sizes.append(size)
+                    else:
+                        chars.append(c)
+                        x1s[-1] = x1
+                    last_x1 = x1
+    texts = ["".join(t) for t in texts]
+    return texts, x0s, x1s, tops, sizes
+
+
+def fitz_page_words(page, x_tolerance=3.0):
+    """pdfplumber-style word dicts (text, x0, x1, top, bottom, size) read from a ``fitz`` page."""
+    return [{"text": t, "x0": a, "x1": b, "top": c, "bottom": c + s, "size": s}
+            for t, a, b, c, s in zip(*fitz_page_columns(page, x_tolerance))]
+
+
+def group_lines(words, tol=3.0, column_gap=0.0, use_numpy=None):
+    """Group word dicts into line records ``(text, x0, top, size)`` in reading order.
+
+    A word joins the current line while its top is within ``tol`` of the line's
+    first word. With ``column_gap`` > 0 a line is split wherever the horizontal gap
+    between neighbouring words exceeds it, so side-by-side columns are not drawn
+    as one run of text starting at the leftmost column.
+
+    Word dicts use the pure-Python loop unless ``use_numpy`` is set: pulling every
+    field out into arrays costs about as much as the NumPy builder saves. Callers
+    that already have columns should use ``group_columns``.
+    """
+    if use_numpy:
+        return assemble_lines([w["text"] for w in words],
+                              [float(w["x0"]) for w in words], [float(w.get("x1", w["x0"])) for w in words],
+                              [float(w["top"]) for w in words], [float(w.get("size", 10)) for w in words],
+                              tol, column_gap)
+    return _group_lines_py(words, tol, column_gap)
+
+
+def group_columns(columns, tol=3.0, column_gap=0.0, use_numpy=None):
+    """``group_lines`` for word columns as returned by ``fitz_page_columns``."""
+    texts, x0, x1, top, size = columns
+    if use_numpy is None: use_numpy = len(texts) >= NUMPY_MIN_WORDS and numpy_module() is not None
+    if use_numpy: return assemble_lines(texts, x0, x1, top, size, tol, column_gap)
+    words = [{"text": t, "x0": a, "x1": b, "top": c, "size": s} for t, a, b, c, s in zip(texts, x0, x1, top, size)]
+    return _group_lines_py(words, tol, column_gap)
+
+
+def _group_lines_py(words, tol, column_gap):
+    words = sorted(words, key=lambda w: (float(w["top"]), float(w["x0"])))
+    lines = []
+    if words:
+        curr, curr_top = [words[0]], float(words[0]["top"])
+        for w in words[1:]:
+            top = float(w["top"])
+            if abs(top - curr_top) <= tol: curr.append(w)
+            else:
+                lines.append(curr)
+                curr, curr_top = [w], top
+        lines.append(curr)
+    p_data = []
+    for line in lines:
+        line.sort(key=lambda w: float(w["x0"]))
+        runs = [line]
+        if column_gap > 0:
+            runs, cur = [], [line[0]]
+            for prev, w in zip(line, line[1:]):
+                if float(w["x0"]) - float(prev.get("x1", prev["x0"])) > column_gap:
+                    runs.append(cur)
+                    cur = []
+                cur.append(w)
+            runs.append(cur)
+        for run in runs:
+            txt = " ".join(w["text"] for w in run)
+            if txt.strip():
+                p_data.append((txt, float(run[0]["x0"]), float(run[0]["top"]), float(run[0].get("size", 10))))
+    return p_data
+
+
+def assemble_lines(texts, x0, x1, top, size, tol=3.0, column_gap=0.0):
+    """Array version of the line builder: same records as the pure-Python loop, in bulk.
+
+    ``x0``, ``x1``, ``top`` and ``size`` are per-word sequences aligned with ``texts``.
+    """
+    n = len(texts)
+    if n == 0: return []
+    np = numpy_module()
+    x0, x1 = np.asarray(x0, dtype=float), np.asarray(x1, dtype=float)
+    top, size = np.asarray(top, dtype=float), np.asarray(size, dtype=float)
+
+    # Top order, then line starts: each line is anchored on its first word and
+    # runs until the first top more than ``tol`` below it. Jumping anchor to anchor
+    # with searchsorted costs one binary search per line instead of a step per word.
+    # ``anchor + tol`` rounds differently from the loop's ``top - anchor <= tol``, so
+    # the search result is nudged until it agrees with that exact test.
+    order = np.argsort(top, kind="stable")
+    tops = top[order]
+    starts = [0]
+    while True:
+        a = tops[starts[-1]]
+        nxt = int(np.searchsorted(tops, a + tol, side="right"))
+        while nxt < n and tops[nxt] - a <= tol: nxt += 1
+        while nxt - 1 > starts[-1] and tops[nxt - 1] - a > tol: nxt -= 1
+        if nxt >= n: break
+        starts.append(nxt)
+    line_id = np.zeros(n, dtype=np.intp)
+    line_id[starts[1:]] = 1
+    line_id = np.cumsum(line_id)
+
+    # Within each line order by x0; the stable sort keeps top order for ties, as the original did.
+    order = order[np.lexsort((x0[order], line_id))]
+    line_id = np.sort(line_id)
+    brk = np.flatnonzero(np.diff(line_id)) + 1
+    if column_gap > 0:
+        gaps = x0[order][1:] - x1[order][:-1]
+        brk = np.union1d(brk, np.flatnonzero((gaps > column_gap) & (np.diff(line_id) == 0)) + 1)
+    bounds = np.concatenate(([0], brk, [n])).astype(np.intp)
+
+    ordered = [texts[i] for i in order.tolist()]
+    first = order[bounds[:-1]]
+    fx, ft, fs = x0[first].tolist(), top[first].tolist(), size[first].tolist()
+    p_data = []
+    for k, (a, b) in enumerate(zip(bounds[:-1].tolist(), bounds[1:].tolist())):
+        txt = " ".join(ordered[a:b])
+        if txt.strip():
+            p_data.append((txt, fx[k], ft[k], fs[k]))
+    return p_data
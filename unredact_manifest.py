@@ -0,0 +1,102 @@
+"""Batch manifest for resumable, skip-if-unchanged runs.
+
+Each output folder keeps an append-only JSON-lines log with one record per
+processed input (the latest record for a path wins). A rerun consults it to
+skip inputs whose content, settings and output have not changed since they last
+succeeded.
+"""
+import os
+import json
+import hashlib
+from datetime import datetime
+
+MANIFEST_NAME = ".unredact_manifest.jsonl"
+
+
+def file_sha256(path, chunk=1 << 20):
+    h = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for block in iter(lambda: fh.read(chunk), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def input_identity(path, with_hash=True):
+    """Size, mtime and (optionally) content hash of an input file."""
+    st = os.stat(path)
+    ident = {"size": st.st_size, "mtime": st.st_mtime}
+    if with_hash: ident["sha256"] = file_sha256(path)
+    return ident
+
+
+class Manifest:
+    def __init__(self, output_dir):
+        self.path = os.path.join(output_dir, MANIFEST_NAME)
+        self.entries = {}
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path): return
+        lines = 0
+        with open(self.path, encoding="utf-8") as fh:
+            for raw in fh:
+                lines += 1
+                try: entry = json.loads(raw)
+                except ValueError: continue  # torn write from an interrupted run
+                self.entries[entry["input"]] = entry
+        if lines > 2 * len(self.entries) + 100: self.compact()
+
+    def compact(self):
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as fh:
+            for entry in self.entries.values():
+                fh.write(json.dumps(entry) + "\n")
+        os.replace(tmp, self.path)
+
+    def get(self, input_path):
+        return self.entries.get(os.path.abspath(input_path))
+
+    def is_current(self, input_path, fingerprint):
+        """True when the last run of ``input_path`` succeeded with the same settings and
+        neither the input nor any of its outputs has changed since."""
+        entry = self.get(input_path)
+        if not entry or entry.get("status") != "ok" or entry.get("fingerprint") != fingerprint: return False
+        outputs = entry.get("outputs")
+        if outputs is None: outputs = {entry.get("output", ""): entry.get("output_size")}  # written before sidecars were tracked
+        try:
+            for out, size in outputs.items():
+                if os.path.getsize(out) != size: return False
+            st = os.stat(input_path)
+        except OSError:
+            return False
+        if st.st_size != entry.get("size"): return False
+        if st.st_mtime == entry.get("mtime"): return True
+        # Touched but possibly identical (copied, re-synced): fall back to the content hash.
+        if file_sha256(input_path) != entry.get("sha256"): return False
+        self.record(dict(entry, mtime=st.st_mtime))
+        return True
+
+    def record(self, entry):
+        entry = dict(entry, input=os.path.abspath(entry["input"]))
+        self.entries[entry["input"]] = entry
+        with open(self.path, "a", encoding="utf-8") as fh:
+            fh.write(json.dumps(entry) + "\n")
+
+    def record_result(self, result, fingerprint, mode, engine_version):
+        """Append the outcome of processing one file, with the size of every output it wrote.
+
+        A file that only succeeded on the cheaper fallback path is recorded under the
+        requested ``fingerprint`` with a ``fallback`` note, so reruns skip it instead of
+        paying for the limit again.
+        """
+        out = os.path.abspath(result["output"]) if result.get("output") else ""
+        sidecar = os.path.abspath(result["sidecar"]) if result.get("sidecar") else ""
+        outputs = {p: os.path.getsize(p) if os.path.exists(p) else None for p in (out, sidecar) if p}
+        entry = {"input": result["input"], "size": result.get("size"), "mtime": result.get("mtime"),
+                 "sha256": result.get("sha256"), "mode": mode, "engine_version": engine_version,
+                 "fingerprint": fingerprint, "output": out, "output_size": outputs.get(out), "sidecar": sidecar,
+                 "outputs": outputs,
+                 "status": result["status"], "error": result.get("error", ""), "pages": result.get("pages", 0),
+                 "finished_at": datetime.now().isoformat(timespec="seconds")}
+        if result.get("fallback"): entry["fallback"] = result["fallback"]
+        self.record(entry)
@@ -0,0 +1,120 @@
+"""Per-stage timing and batch metrics.
+
+The engine times each stage of each file (redaction detection, page-cache
+lookups, extraction, line grouping, writing, export, save, indexing) into the
+file's result record under ``stage_seconds``. ``BatchMetrics`` gathers those records into one JSON file per
+batch, and ``slowest_report`` turns them into a short table for the log. The file is rewritten every
+minute while the batch runs, so a killed run still leaves one behind; an endless run (watch mode)
+moves on to a new ``_partNNNN`` file every ``SEGMENT_FILES`` records so memory stays flat.
+"""
+import os
+import json
+import time
+import cProfile
+from datetime import datetime
+
+STAGES = ("open", "detect", "cache", "extract", "group", "write", "export", "save", "index")
+METRICS_DIR = ".unredact_metrics"
+WRITE_EVERY_SECONDS = 60  # how often a running batch rewrites its metrics file
+SEGMENT_FILES = 500  # file records per metrics file in streaming (watch) mode
+
+
+class StageTimer:
+    """Accumulates wall time per stage: ``t = timer.add("extract", t)`` after each step."""
+    def __init__(self):
+        self.seconds = {}
+
+    def add(self, stage, since):
+        now = time.perf_counter()
+        self.seconds[stage] = self.seconds.get(stage, 0.0) + now - since
+        return now
+
+
+def merge_stats(into, stats):
+    """Sum the numbers in ``stats`` into ``into``, descending into nested dicts (shard results)."""
+    for k, v in stats.items():
+        if isinstance(v, dict): merge_stats(into.setdefault(k, {}), v)
+        elif isinstance(v, (int, float)): into[k] = into.get(k, 0) + v
+    return into
+
+
+def run_profiled(profile_dir, name, fn, *args):
+    """Call ``fn(*args)`` under cProfile and dump the stats to ``profile_dir/name.prof``."""
+    os.makedirs(profile_dir, exist_ok=True)
+    prof = cProfile.Profile()
+    try: return prof.runcall(fn, *args)
+    finally: prof.dump_stats(os.path.join(profile_dir, f"{name}.prof"))
+
+
+def metrics_path_for(output_dir, started=None):
+    stamp = (started or datetime.now()).strftime("%Y%m%d_%H%M%S")
+    return os.path.join(output_dir, METRICS_DIR, f"batch_{stamp}.json")
+
+
+def file_record(res):
+    keys = ("input", "output", "status", "error", "pages", "words", "lines", "redacted_pages", "seconds",
+            "busy_seconds", "output_bytes", "size", "stage_seconds", "fallback")
+    return {k: res[k] for k in keys if k in res}
+
+
+def stage_totals(results):
+    totals = {}
+    for r in results: merge_stats(totals, r.get("stage_seconds", {}))
+    return totals
+
+
+class BatchMetrics:
+    """Structured record of one batch, written as JSON while the batch runs and when it ends."""
+    def __init__(self, path, config, segment=0):
+        self.path = path
+        self.started = datetime.now()
+        self.config = config
+        self.segment = segment
+        self.files = []
+        self.written_at = time.monotonic()
+
+    def add(self, res):
+        self.files.append(file_record(res))
+
+    @property
+    def full(self):
+        return len(self.files) >= SEGMENT_FILES
+
+    def due(self, streaming=False):
+        """True when the file should be rewritten now: every minute, and when a streaming segment is full."""
+        return (streaming and self.full) or time.monotonic() - self.written_at >= WRITE_EVERY_SECONDS
+
+    def next_segment(self):
+        """An empty record for the files after this one's, written next to it as ``<name>_partNNNN.json``."""
+        root, ext = os.path.splitext(self.path)
+        if self.segment: root = root.rsplit("_part", 1)[0]
+        return BatchMetrics(f"{root}_part{self.segment + 1:04d}{ext}", self.config, self.segment + 1)
+
+    def write(self, summary, complete=True):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        config = {k: v for k, v in vars(self.config).items() if isinstance(v, (str, int, float, bool))}
+        data = {"started": self.started.isoformat(timespec="seconds"), "finished": datetime.now().isoformat(timespec="seconds"),
+                "complete": complete, "config": config, "summary": summary, "stage_seconds": stage_totals(self.files), "files": self.files}
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump(data, fh, indent=1)
+        os.replace(tmp, self.path)
+        self.written_at = time.monotonic()
+        return self.path
+
+
+def slowest_report(results, n=5):
+    """Lines of text: where the batch's time went by stage, then the ``n`` slowest files."""
+    ok = [r for r in results if r.get("status") == "ok"]
+    if not ok: return []
+    totals = stage_totals(ok)
+    total = sum(totals.values()) or 1.0
+    lines = ["Time by stage: " + ", ".join(f"{k} {v:.1f}s ({v / total:.0%})"
+                                           for k, v in sorted(totals.items(), key=lambda kv: -kv[1]) if v >= 0.005)]
+    lines.append(f"{'slowest files':40} {'seconds':>8} {'pages':>6} {'pages/s':>8}  top stage")
+    for r in sorted(ok, key=lambda r: -r["seconds"])[:n]:
+        st = r.get("stage_seconds") or {}
+        top = max(st.items(), key=lambda kv: kv[1]) if st else ("-", 0.0)
+        lines.append(f"{os.path.basename(r['input'])[-40:]:40} {r['seconds']:>8.2f} {r['pages']:>6} "
+                     f"{r['pages'] / max(r['seconds'], 1e-9):>8.1f}  {top[0]} {top[1]:.2f}s")
+    return lines
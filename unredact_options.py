@@ -0,0 +1,12 @@
+"""Choices accepted by the engine's string options.
+
+Kept apart from ``unredact_engine`` so the dashboard can fill its option widgets
+without importing PyMuPDF and the whole pipeline at startup.
+"""
+
+MODES = ("side_by_side", "overlay_white")
+BACKENDS = ("pymupdf", "pdfplumber")
+CLEAN_PAGE_MODES = ("process", "passthrough", "skip")
+SAVE_MODES = ("full", "incremental", "linear")
+PAGE_CACHE_MODES = ("auto", "on", "off")
+TEXT_WRITERS = ("batched", "per_line")
@@ -0,0 +1,145 @@
+"""Persistent cache of extracted page text, shared across files and batches.
+
+Productions repeat pages constantly: cover sheets, the same exhibit attached to
+many emails, documents re-produced in later volumes. Each page is keyed by a
+hash of what its text extraction depends on: the decoded content stream, the
+resources it draws with (fonts, form XObjects and so on, hashed recursively so
+the key does not depend on object numbers) and the page geometry. The extracted
+word columns are stored under that key, so an identical page anywhere is
+extracted only once.
+
+The store is a SQLite file with a size budget; the least recently used pages
+are evicted when it grows past it. The cache is best effort: a locked or
+damaged database only means pages are extracted again.
+"""
+import os
+import re
+import json
+import time
+import zlib
+import sqlite3
+import hashlib
+
+CACHE_NAME = ".unredact_pagecache.sqlite"
+CACHE_VERSION = "1"  # bump when the stored columns change meaning
+COMMIT_EVERY = 64  # new entries buffered in memory, then written in one short transaction
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (key TEXT PRIMARY KEY, data BLOB, size INTEGER, used REAL);
+CREATE INDEX IF NOT EXISTS pages_used ON pages(used);
+"""
+
+REF = re.compile(r"\b(\d+) (\d+) R\b")
+# Back-pointers into the page tree would pull every page into the hash.
+SKIP_REF = re.compile(r"/(Parent|P|StructParent|StructParents)\s+\d+ \d+ R")
+
+
+def cache_path_for(output_dir):
+    return os.path.join(output_dir, CACHE_NAME)
+
+
+def _object_digest(doc, xref, memo):
+    """Hash of object ``xref`` and, in place of their numbers, everything it references."""
+    got = memo.get(xref)
+    if got is not None: return got
+    memo[xref] = "cycle"
+    try:
+        src = SKIP_REF.sub("", doc.xref_object(xref, compressed=True))
+        h = hashlib.sha1(REF.sub(lambda m: _object_digest(doc, int(m.group(1)), memo), src).encode())
+        if doc.xref_is_stream(xref): h.update(doc.xref_stream_raw(xref) or b"")
+        digest = h.hexdigest()
+    except Exception:
+        digest = f"bad{xref}"  # broken object: unique to this document, never shared
+    memo[xref] = digest
+    return digest
+
+
+def _page_resources(doc, page):
+    """Source of the page's /Resources, following inheritance up the page tree."""
+    xref = page.xref
+    for _ in range(64):
+        kind, value = doc.xref_get_key(xref, "Resources")
+        if kind != "null": return value
+        kind, parent = doc.xref_get_key(xref, "Parent")
+        if kind != "xref": break
+        xref = int(parent.split()[0])
+    return ""
+
+
+def page_key(doc, page, backend, memo):
+    """Cache key for one page's extracted text. ``memo`` is a per-document dict of object hashes."""
+    h = hashlib.sha1(f"{CACHE_VERSION}|{backend}|{tuple(page.rect)}|{tuple(page.mediabox)}|{page.rotation}|".encode())
+    resources = SKIP_REF.sub("", _page_resources(doc, page))
+    h.update(REF.sub(lambda m: _object_digest(doc, int(m.group(1)), memo), resources).encode())
+    h.update(page.read_contents())
+    return h.hexdigest()
+
+
+class PageCache:
+    """SQLite-backed store of ``key -> (columns, heights)``. Safe to open from several worker processes."""
+    def __init__(self, path, budget_mb=512):
+        self.path = path
+        self.budget = int(budget_mb * 1024 * 1024)
+        self.db = sqlite3.connect(path, timeout=60)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(SCHEMA)
+        self.hits = self.misses = 0
+        self.used = set()  # keys hit this session; their timestamps are refreshed on close
+        self.pending = []  # entries not written yet
+
+    def get(self, key):
+        try: row = self.db.execute("SELECT data FROM pages WHERE key = ?", (key,)).fetchone()
+        except sqlite3.Error: row = None
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.used.add(key)
+        cols = json.loads(zlib.decompress(row[0]))
+        return tuple(cols[:5]), cols[5]
+
+    def has(self, key):
+        try: return self.db.execute("SELECT 1 FROM pages WHERE key = ?", (key,)).fetchone() is not None
+        except sqlite3.Error: return False
+
+    def put(self, key, cols, heights):
+        data = zlib.compress(json.dumps(list(cols) + [list(heights)], separators=(",", ":")).encode(), 1)
+        self.pending.append((key, data, len(data), time.time()))
+        if len(self.pending) >= COMMIT_EVERY: self.commit()
+
+    def commit(self):
+        """Write the buffered entries. The write lock is held only for this one statement,
+        so workers sharing the cache do not queue behind each other for a whole file."""
+        rows, self.pending = self.pending, []
+        if not rows: return
+        try:
+            with self.db:
+                self.db.executemany("INSERT OR REPLACE INTO pages (key, data, size, used) VALUES (?, ?, ?, ?)", rows)
+        except sqlite3.Error:
+            pass  # lock held too long by another writer: these pages are extracted again next time
+
+    def evict(self):
+        """Drop least recently used pages until the store is back under 90% of its budget."""
+        total = self.db.execute("SELECT total(size) FROM pages").fetchone()[0]
+        if total <= self.budget: return 0
+        drop, excess = [], total - self.budget * 0.9
+        for key, size in self.db.execute("SELECT key, size FROM pages ORDER BY used").fetchall():
+            if excess <= 0: break
+            drop.append((key,))
+            excess -= size
+        with self.db: self.db.executemany("DELETE FROM pages WHERE key = ?", drop)
+        return len(drop)
+
+    def close(self):
+        try:
+            self.commit()
+            if self.used:
+                now = time.time()
+                with self.db: self.db.executemany("UPDATE pages SET used = ? WHERE key = ?", ((now, k) for k in self.used))
+            self.evict()
+        finally:
+            self.db.close()
+
+    def __enter__(self): return self
+    def __exit__(self, *exc): self.close()
@@ -0,0 +1,106 @@
+"""Input queue and folder scanning for the dashboard.
+
+``FileQueue`` is the ordered list of queued paths with a path -> row index, so
+adding, de-duplicating and finding a file are O(1) however long the queue gets.
+``FolderScan`` walks a folder tree with ``os.scandir`` on a background thread
+and hands the PDFs it finds back in batches, so a share with hundreds of
+thousands of files streams into the queue while the UI stays responsive.
+Nothing here touches Tk.
+"""
+import os
+import queue
+import threading
+
+SCAN_BATCH = 2000  # paths per batch handed back by a folder scan
+
+
+class FileQueue:
+    """Ordered, de-duplicated paths with a per-path status."""
+    def __init__(self):
+        self.paths = []
+        self.rows = {}  # path -> position in ``paths``
+        self.status = {}  # path -> last status shown for it
+
+    def __len__(self): return len(self.paths)
+    def __getitem__(self, i): return self.paths[i]
+    def __contains__(self, path): return path in self.rows
+    def __iter__(self): return iter(self.paths)
+
+    def add(self, paths):
+        """Append the paths not queued yet; returns how many were new."""
+        n = len(self.paths)
+        for p in paths:
+            if p not in self.rows:
+                self.rows[p] = len(self.paths)
+                self.paths.append(p)
+        return len(self.paths) - n
+
+    def row(self, path):
+        return self.rows.get(path)
+
+    def sort(self, key=None):
+        self.paths.sort(key=key)
+        self.rows = {p: i for i, p in enumerate(self.paths)}
+
+    def clear(self):
+        self.paths, self.rows, self.status = [], {}, {}
+
+
+def scan_pdfs(folder, recursive=True, batch=SCAN_BATCH, stop=None):
+    """Yield lists of up to ``batch`` PDF paths under ``folder``, depth first, each folder in name order."""
+    found, stack = [], [folder]
+    while stack:
+        if stop is not None and stop.is_set(): return
+        d = stack.pop()
+        try:
+            with os.scandir(d) as it: entries = sorted(it, key=lambda e: e.name)
+        except OSError:
+            continue  # unreadable folder: skip it, as rglob did
+        subdirs = []
+        for e in entries:
+            try:
+                if e.is_dir(follow_symlinks=False):
+                    if recursive: subdirs.append(e.path)
+                elif e.name.lower().endswith(".pdf") and e.is_file():
+                    found.append(e.path)
+            except OSError:
+                continue
+            if len(found) >= batch:
+                yield found
+                found = []
+        stack.extend(reversed(subdirs))
+    if found: yield found
+
+
+class FolderScan:
+    """Runs ``scan_pdfs`` on a thread. The UI drains ``batches()`` from a timer until ``done``."""
+    def __init__(self, folder, recursive=True, batch=SCAN_BATCH):
+        self.folder = folder
+        self.results = queue.Queue()
+        self.stop = threading.Event()
+        self.done = False
+        self.found = 0
+        self.thread = threading.Thread(target=self._run, args=(recursive, batch), daemon=True)
+        self.thread.start()
+
+    def _run(self, recursive, batch):
+        try:
+            for paths in scan_pdfs(self.folder, recursive, batch, self.stop):
+                self.results.put(paths)
+        finally:
+            self.results.put(None)
+
+    def cancel(self):
+        self.stop.set()
+
+    def batches(self):
+        """Batches found since the last call, without blocking."""
+        out = []
+        while True:
+            try: paths = self.results.get_nowait()
+            except queue.Empty: break
+            if paths is None: self.done = True
+            else:
+                self.found += len(paths)
+                out.append(paths)
+        return out
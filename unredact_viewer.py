@@ -0,0 +1,186 @@
+"""Rendering support for the results viewer.
+
+Keeps a small pool of open documents, a memory-budgeted LRU cache of rendered
+pages keyed by (file, page, zoom), clip-based tile rendering for zoom levels
+where a whole-page bitmap would be too large, and a background thread that renders the
+pages the user is likely to look at next. Nothing here touches Tk, so cached
+frames are ``(width, height, rgb_bytes)`` tuples of raw pixmap samples that the
+UI copies into images on the main thread, with no PPM encode/decode in between.
+
+PyMuPDF is not thread-safe, so every ``fitz`` call from the UI or the prefetch
+thread goes through ``FITZ_LOCK``. PyMuPDF itself is imported by the functions that
+use it, so loading this module (and the app) does not pay for it up front.
+"""
+import os
+import queue
+import threading
+from collections import OrderedDict
+
+FITZ_LOCK = threading.RLock()
+
+TILE_SIZE = 512  # pixels per side of a tile in tiled mode
+TILED_MIN_PIXELS = 12_000_000  # pages rendering larger than this are drawn tile by tile
+
+
+def file_key(path):
+    """Identify a file by path and modification time, so rewritten outputs are not served stale."""
+    try: return (path, os.stat(path).st_mtime_ns)
+    except OSError: return (path, 0)
+
+
+def zoom_key(zoom):
+    return round(zoom, 4)
+
+
+def render_frame(doc, page_no, zoom):
+    """Rasterize one page; returns ``(width, height, rgb_bytes)``. Caller holds ``FITZ_LOCK``."""
+    import fitz  # PyMuPDF
+    page = doc.load_page(page_no)
+    pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), alpha=False)
+    return pix.width, pix.height, pix.samples
+
+
+def ppm_bytes(frame):
+    """Wrap a raw frame in a PPM header for Tk builds without Pillow's direct blit."""
+    width, height, samples = frame
+    return b"P6\n%d %d\n255\n" % (width, height) + samples
+
+
+def page_pixel_size(width_pts, height_pts, zoom):
+    return int(width_pts * zoom + 0.999), int(height_pts * zoom + 0.999)
+
+
+def visible_tiles(x0, y0, x1, y1, width, height, tile=TILE_SIZE, margin=1):
+    """``(col, row)`` of the tiles of a ``width`` x ``height`` pixel page that intersect the
+    viewport ``(x0, y0)-(x1, y1)``, widened by ``margin`` tiles so scrolling finds them ready.
+    Visible tiles come first."""
+    cols, rows = -(-width // tile), -(-height // tile)
+    c0, c1 = max(0, int(x0 // tile)), min(cols - 1, int(x1 // tile))
+    r0, r1 = max(0, int(y0 // tile)), min(rows - 1, int(y1 // tile))
+    inner = [(c, r) for r in range(r0, r1 + 1) for c in range(c0, c1 + 1)]
+    outer = [(c, r) for r in range(max(0, r0 - margin), min(rows - 1, r1 + margin) + 1)
+             for c in range(max(0, c0 - margin), min(cols - 1, c1 + margin) + 1) if not (c0 <= c <= c1 and r0 <= r <= r1)]
+    return inner + outer
+
+
+def render_tile(doc, page_no, zoom, col, row, tile=TILE_SIZE):
+    """Rasterize only the ``(col, row)`` tile of a page via a clip rectangle. Caller holds ``FITZ_LOCK``."""
+    import fitz  # PyMuPDF
+    page = doc.load_page(page_no)
+    x0, y0 = col * tile / zoom, row * tile / zoom
+    clip = fitz.Rect(x0, y0, x0 + tile / zoom, y0 + tile / zoom) & page.rect
+    pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), clip=clip, alpha=False)
+    return pix.width, pix.height, pix.samples
+
+
+def hit_rect(hit, zoom, origin=(0, 0)):
+    """Canvas rectangle around an index hit, measuring the line in the font it was drawn with."""
+    import fitz  # PyMuPDF
+    width = fitz.get_text_length(hit["text"], fontname="helv", fontsize=hit["size"])
+    ox, oy = origin
+    return (ox + hit["x"] * zoom, oy + hit["top"] * zoom,
+            ox + (hit["x"] + width) * zoom, oy + (hit["top"] + hit["size"] * 1.2) * zoom)
+
+
+class DocumentPool:
+    """Open documents kept around between file switches, least recently used closed first."""
+    def __init__(self, max_docs=6):
+        self.max_docs = max_docs
+        self.docs = OrderedDict()  # file_key -> fitz.Document
+        self.pinned = set()
+
+    def get(self, path):
+        import fitz  # PyMuPDF
+        key = file_key(path)
+        with FITZ_LOCK:
+            doc = self.docs.get(key)
+            if doc is None:
+                for old in [k for k in self.docs if k[0] == path]:
+                    self.docs.pop(old).close()  # stale copy of a rewritten file
+                doc = self.docs[key] = fitz.open(path)
+            self.docs.move_to_end(key)
+            for k in list(self.docs):
+                if len(self.docs) <= self.max_docs: break
+                if k != key and k[0] not in self.pinned:
+                    self.docs.pop(k).close()
+            return doc
+
+    def close_all(self):
+        with FITZ_LOCK:
+            for doc in self.docs.values(): doc.close()
+            self.docs.clear()
+
+
+class PageCache:
+    """LRU cache of rendered frames bounded by total byte size."""
+    def __init__(self, budget_bytes=256 * 1024 * 1024):
+        self.budget = budget_bytes
+        self.frames = OrderedDict()
+        self.size = 0
+        self.hits = self.misses = 0
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            frame = self.frames.get(key)
+            if frame is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.frames.move_to_end(key)
+            return frame
+
+    def __contains__(self, key):
+        with self.lock: return key in self.frames
+
+    def put(self, key, frame):
+        nbytes = len(frame[2])
+        if nbytes > self.budget: return
+        with self.lock:
+            old = self.frames.pop(key, None)
+            if old: self.size -= len(old[2])
+            self.frames[key] = frame
+            self.size += nbytes
+            while self.size > self.budget:
+                _, evicted = self.frames.popitem(last=False)
+                self.size -= len(evicted[2])
+
+    def clear(self):
+        with self.lock:
+            self.frames.clear()
+            self.size = 0
+
+
+class PagePrefetcher:
+    """Background renderer filling a ``PageCache`` with pages requested ahead of time."""
+    def __init__(self, pool, cache):
+        self.pool, self.cache = pool, cache
+        self.requests = queue.Queue()
+        self.generation = 0
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def request(self, targets):
+        """Replace any pending work with ``targets``: ``(path, page_no, zoom)`` tuples, most wanted first."""
+        self.generation += 1
+        for t in targets: self.requests.put((self.generation, t))
+
+    def stop(self):
+        self.requests.put(None)
+
+    def _run(self):
+        while True:
+            item = self.requests.get()
+            if item is None: return
+            gen, (path, page_no, zoom) = item
+            if gen != self.generation: continue  # superseded by a newer navigation
+            key = (file_key(path), page_no, zoom_key(zoom))
+            if key in self.cache: continue
+            try:
+                with FITZ_LOCK:
+                    doc = self.pool.get(path)
+                    if not 0 <= page_no < doc.page_count: continue
+                    frame = render_frame(doc, page_no, zoom)
+                self.cache.put(key, frame)
+            except Exception:
+                continue  # unreadable or vanished file; the UI reports it if the user opens it
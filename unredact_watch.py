@@ -0,0 +1,205 @@
+"""Watch-folder mode: process PDFs as they arrive.
+
+Polls one or more input folders and feeds every new PDF to the engine once it has
+finished being written (its size and mtime stayed put for ``--settle`` seconds).
+A folder is only re-listed when its own mtime changes, so idle trees cost one
+``stat`` per folder per poll. Each arrival is handed out once; restarts and
+re-copies of identical files are caught by the output folder's manifest. Once a
+file's result is in the manifest the watcher forgets it and asks the manifest
+instead, so a watcher running for months holds only the files in flight.
+
+    python -m unredact_watch ./incoming -o ./unredacted
+"""
+import os
+import sys
+import time
+import queue
+import signal
+import threading
+from datetime import datetime
+
+from unredact_engine import (IDLE, BatchControl, UnredactEngine, build_arg_parser, config_fingerprint, config_from_args,
+                             describe_result, log)
+from unredact_manifest import Manifest
+
+
+class FolderWatcher:
+    """Polling scanner that reports each settled PDF under ``folders`` once per version of the file.
+
+    ``done(path, stat)`` says whether that version of a file was already dealt with; it is
+    asked about the files of re-listed folders that ``release`` has dropped from ``handed``.
+    """
+    def __init__(self, folders, recursive=True, settle=2.0, exclude=(), done=None):
+        self.folders = [os.path.abspath(f) for f in folders]
+        self.recursive = recursive
+        self.settle = settle
+        self.exclude = tuple(os.path.abspath(e) for e in exclude)
+        self.dirs = {}  # folder -> (mtime_ns at its last listing, subfolders)
+        self.candidates = {}  # path -> ((size, mtime_ns) or None, time that signature was first seen)
+        self.handed = {}  # path -> (size, mtime_ns) it had when handed out, until released
+        self.done = done
+
+    def _excluded(self, path):
+        return any(path == e or path.startswith(e + os.sep) for e in self.exclude)
+
+    def _scan_dir(self, folder):
+        try: mtime = os.stat(folder).st_mtime_ns
+        except OSError:
+            self._forget(folder)
+            return
+        known = self.dirs.get(folder)
+        if known is None or known[0] != mtime:
+            # Entries were added, removed or renamed: re-list just this folder.
+            subdirs = []
+            try:
+                with os.scandir(folder) as it:
+                    for e in it:
+                        if e.is_dir(follow_symlinks=False):
+                            if self.recursive and not self._excluded(e.path): subdirs.append(e.path)
+                        elif e.name.lower().endswith(".pdf") and e.is_file() and e.path not in self.candidates:
+                            st = e.stat()
+                            if self.handed.get(e.path) == (st.st_size, st.st_mtime_ns): continue
+                            # First listing: everything goes to the engine, whose manifest check has the final say.
+                            if known is not None and self.done is not None and self.done(e.path, st): continue
+                            self.candidates[e.path] = (None, 0.0)
+            except OSError:
+                return
+            for gone in set(known[1] if known else ()) - set(subdirs): self._forget(gone)
+            self.dirs[folder] = known = (mtime, subdirs)
+        for d in known[1]: self._scan_dir(d)
+
+    def release(self, path):
+        """Stop tracking a file handed out earlier; call once its result is in the manifest."""
+        self.handed.pop(path, None)
+
+    def _forget(self, folder):
+        gone = self.dirs.pop(folder, None)
+        for d in gone[1] if gone else (): self._forget(d)
+
+    def poll(self):
+        """One pass over the folders; returns the paths that became ready since the last pass."""
+        for folder in self.folders: self._scan_dir(folder)
+        ready, now = [], time.time()
+        for path, (sig, since) in list(self.candidates.items()):
+            try: st = os.stat(path)
+            except OSError:
+                del self.candidates[path]  # moved away or deleted before it settled
+                continue
+            cur = (st.st_size, st.st_mtime_ns)
+            if cur != sig:
+                # A file first seen untouched for ``settle`` seconds (already there at startup) counts as settled.
+                since = st.st_mtime if sig is None else now
+                self.candidates[path] = (cur, since)
+            if st.st_size and now - since >= self.settle and now - st.st_mtime >= self.settle:
+                del self.candidates[path]
+                if self.handed.get(path) != cur:
+                    self.handed[path] = cur
+                    ready.append(path)
+        return sorted(ready)
+
+
+def manifest_check(manifest, config):
+    """``FolderWatcher`` ``done`` callback: the manifest already has this version of the file,
+    either from this run or as a current output of an earlier one."""
+    fingerprint, started = config_fingerprint(config), datetime.now().isoformat(timespec="seconds")
+
+    def done(path, st):
+        entry = manifest.get(path)
+        if not entry or entry.get("size") != st.st_size or entry.get("mtime") != st.st_mtime: return False
+        return entry.get("finished_at", "") >= started or (entry.get("status") == "ok" and entry.get("fingerprint") == fingerprint)
+    return done
+
+
+def watch_queue(watcher, interval=1.0, maxsize=64, stop=None):
+    """Run ``watcher`` on a thread, feeding ready paths into a bounded queue. Returns ``(queue, stop, thread)``."""
+    q = queue.Queue(maxsize=maxsize)
+    stop = stop or threading.Event()
+
+    def run():
+        while not stop.is_set():
+            try: ready = watcher.poll()
+            except Exception as e:
+                log(f"Watch scan failed: {e}")
+                ready = []
+            for path in ready:
+                while not stop.is_set():
+                    try:
+                        q.put(path, timeout=0.25)  # blocks while the engine is behind
+                        break
+                    except queue.Full:
+                        continue
+            stop.wait(interval)
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    return q, stop, thread
+
+
+def arrivals(q, stop, idle_after=0.25):
+    """Endless input for ``UnredactEngine.run_batch``: queued paths, or ``IDLE`` while none are waiting."""
+    while not stop.is_set():
+        try: yield q.get(timeout=idle_after)
+        except queue.Empty: yield IDLE
+
+
+# --- CLI ---
+def build_watch_parser():
+    ap = build_arg_parser()
+    ap.prog = "unredact_watch"
+    ap.description = "Watch folders and unredact PDFs as they arrive."
+    ap.add_argument("--interval", type=float, default=1.0, help="seconds between folder scans")
+    ap.add_argument("--settle", type=float, default=2.0,
+                    help="seconds a file's size and mtime must stay unchanged before it is picked up")
+    ap.add_argument("--queue-size", type=int, default=64, help="ready files buffered ahead of the engine")
+    return ap
+
+
+def main(argv=None):
+    args = build_watch_parser().parse_args(argv)
+    if args.no_pdf and not args.export:
+        print("--no-pdf needs an --export format.", file=sys.stderr)
+        return 2
+    folders = [f for f in args.inputs if os.path.isdir(f)]
+    if len(folders) != len(args.inputs):
+        print("Watch mode takes folders only.", file=sys.stderr)
+        return 2
+
+    config = config_from_args(args)
+    engine = UnredactEngine(config, log=log)
+    os.makedirs(args.output_dir, exist_ok=True)
+    manifest = Manifest(args.output_dir)
+    watcher = FolderWatcher(folders, recursive=not args.no_subdirs, settle=args.settle, exclude=[args.output_dir],
+                            done=manifest_check(manifest, config))
+    q, stop, thread = watch_queue(watcher, args.interval, max(1, args.queue_size))
+    control = BatchControl()
+    main_pid = os.getpid()
+
+    def shutdown(*_):
+        if stop.is_set() or os.getpid() != main_pid: return  # pool workers inherit the handler
+        log("Stopping after the files in progress...")
+        stop.set()
+        control.cancel()
+
+    signal.signal(signal.SIGINT, shutdown)
+    signal.signal(signal.SIGTERM, shutdown)
+    log(f"Watching {', '.join(folders)} -> {args.output_dir}")
+
+    counts = {"ok": 0, "error": 0, "skipped": 0}
+
+    def on_result(i, res):
+        watcher.release(res["input"])
+        counts[res["status"]] += 1
+        if res["status"] == "skipped": return
+        lag = time.time() - res.get("mtime", time.time())
+        log(f"{describe_result(res)}" + (f", {lag:.1f}s after its last write" if res["status"] == "ok" else ""))
+
+    engine.run_batch(arrivals(q, stop), on_result=on_result, control=control, keep_results=False, manifest=manifest)
+    stop.set()
+    thread.join(timeout=2)
+    log(f"Watch stopped. {counts['ok']} processed, {counts['error']} failed.")
+    if engine.last_metrics_path: log(f"Metrics: {engine.last_metrics_path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())